@@ -0,0 +1,20 @@
+"""Headless compute core shared by the Streamlit pages and batch jobs.
+
+Nothing here imports Streamlit; plotly and networkx are imported only when a
+figure or route graph is actually built. Submodules load on first use, so
+``import analytics`` itself is instant. ``python -m analytics`` runs any
+analysis over a file (see cli.py).
+"""
+import importlib
+
+__all__ = [
+    'chart_render', 'cli', 'container_cube', 'container_index', 'data_version', 'delta_store', 'exports',
+    'fifo_engine', 'fifo_monitor', 'instrument', 'kpi_engine', 'kpi_rollups', 'leg_metrics',
+    'release_allocator', 'route_map', 'route_network', 'snapshot', 'synthetic', 'timeline', 'voyages',
+]
+
+
+def __getattr__(name):
+    if name in __all__:
+        return importlib.import_module(f'.{name}', __name__)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,405 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from . import synthetic
+
+# Result files, one per run, named <UTC time>-<git commit>.json
+RESULTS_DIR = os.path.join('benchmarks', 'results')
+REPEAT = 3
+# A benchmark is a regression when its median time grows by more than this
+TOLERANCE = 0.10
+# pandas' ExcelWriter (generate) cannot go past one sheet
+EXCEL_MAX_ROWS = 1_048_575
+
+# name -> (schema, setup); setup(data) returns the zero-argument call that is timed
+BENCHMARKS = {}
+
+
+def benchmark(name, schema):
+    def register(setup):
+        BENCHMARKS[name] = (schema, setup)
+        return setup
+    return register
+
+
+# ── fifo.py ─────────────────────────────────────────────────
+@benchmark('fifo.analyse_fifo', 'myt_dry')
+def _analyse_fifo(df):
+    from . import fifo_engine
+    return lambda: fifo_engine.analyse_fifo(df)
+
+
+@benchmark('fifo.analyse_fifo_parallel', 'myt_dry')
+def _analyse_fifo_parallel(df):
+    # worker processes' memory is not seen by tracemalloc, only the parent's
+    from . import fifo_engine
+    return lambda: fifo_engine.analyse_fifo_parallel(df)
+
+
+# ── fiforeport.py ───────────────────────────────────────────
+@benchmark('fiforeport.release', 'activity')
+def _release(df):
+    from .release_allocator import CONTAINER_TYPES, ReleaseAllocator
+
+    def run():
+        # every port/size/type pool the page can ask for, then its two release modes
+        allocator = ReleaseAllocator(df)
+        released = 0
+        for port in df['POL Port'].cat.categories:
+            for size in df['Size'].cat.categories:
+                for types in [None, *CONTAINER_TYPES.values()]:
+                    pool = allocator.pool(port, size, types)
+                    agent = pool.best_single_agent(20)
+                    if agent is not None:
+                        released += len(pool.single_agent_release(agent, 20))
+                    released += len(pool.oldest_across_agents(20))
+        return released
+    return run
+
+
+@benchmark('fiforeport.plan_batch', 'activity')
+def _plan_batch(df):
+    from .release_allocator import CONTAINER_TYPES, ReleaseAllocator
+    rng = np.random.default_rng(0)
+    bookings = 500
+    requests = pd.DataFrame({
+        'Booking': [f'BK{i:05d}' for i in range(bookings)],
+        'POL Port': rng.choice(df['POL Port'].cat.categories, bookings),
+        'Size': rng.choice(df['Size'].cat.categories, bookings),
+        'Container Type': rng.choice(['', *CONTAINER_TYPES], bookings),
+        'Quantity': rng.integers(1, 50, bookings),
+    })
+    return lambda: ReleaseAllocator(df).plan_batch(requests)[0]
+
+
+# ── mty.py ──────────────────────────────────────────────────
+@benchmark('mty.cubes', 'activity')
+def _cubes(df):
+    from .container_cube import summary_cubes
+    return lambda: summary_cubes(df)
+
+
+@benchmark('mty.pivots', 'activity')
+def _pivots(df):
+    from .container_cube import TYPE_GROUPS, summary_cubes
+    cubes = summary_cubes(df)
+
+    def run():
+        # the MYT tab's pivot for every region x company x container type selection
+        tables = []
+        for region in df['Region Name'].cat.categories:
+            for company in [None, *df['Company'].cat.categories]:
+                for group in TYPE_GROUPS:
+                    tables.append(cubes['myt'].pivot('POL Agent', {
+                        'Type Group': group, 'Region Name': region, 'Company': company}))
+        return sum(len(t) for t in tables)
+    return run
+
+
+def _myt_rows(df):
+    return df[df['Activity Mode'] == 'Empty']
+
+
+def _export(fmt):
+    def setup(df):
+        from . import exports
+        rows = _myt_rows(df)
+        return lambda: exports.to_bytes(rows, fmt)
+    return setup
+
+
+for _fmt in ['Excel', 'CSV', 'Parquet']:
+    benchmark(f'mty.export_{_fmt.lower()}', 'activity')(_export(_fmt))
+
+
+# ── inventory kpi.py ────────────────────────────────────────
+@benchmark('kpi.merge_mapping', 'kpi')
+def _merge_mapping(data):
+    from . import kpi_engine
+    activity, mapping = data
+    # merge_mapping cleans its inputs in place, so each run gets fresh copies
+    return lambda: kpi_engine.merge_mapping(activity.copy(), mapping.copy())
+
+
+@benchmark('kpi.filter_index', 'kpi')
+def _filter_index(data):
+    from . import kpi_engine
+    merged = kpi_engine.merge_mapping(data[0].copy(), data[1].copy())
+    return lambda: kpi_engine.FilterIndex(merged)
+
+
+@benchmark('kpi.aggregations', 'kpi')
+def _aggregations(data):
+    from . import chart_render
+    from . import kpi_engine
+    index = kpi_engine.FilterIndex(kpi_engine.merge_mapping(data[0].copy(), data[1].copy()))
+    regions = index.options('Region')[:2]
+
+    def run():
+        # one sidebar selection: filter, then every table, the heatmap and the trend
+        kpis = kpi_engine.GroupingSets(index.df, index.select({'Region': regions}))
+        kpis.totals()
+        for level in ['subordinate', 'Lead', 'Region', 'POL Port']:
+            kpis.level(level)
+        chart_render.capped_heatmap(kpis.cube, 'subordinate', 'POL Port')
+        return len(chart_render.downsample(kpis.trend('Daily'), 'Date', 'Delay (Days)'))
+    return run
+
+
+# ── vessel.py ───────────────────────────────────────────────
+@benchmark('vessel.voyage_table', 'voyages')
+def _voyage_table(df):
+    from .voyages import VoyageTable
+    return lambda: VoyageTable(df)
+
+
+@benchmark('vessel.round_trips', 'voyages')
+def _round_trips(df):
+    from .voyages import VoyageTable, distribution, round_trips
+    legs = VoyageTable(df).legs
+
+    def run():
+        cycles, calls = round_trips(legs, 'NOVOROSSIYSK')
+        distribution(cycles, 'Vessel', ['Cycle Days', 'Sea Days', 'Dwell Days'])
+        return len(cycles)
+    return run
+
+
+@benchmark('vessel.route_map', 'voyages')
+def _route_map(df):
+    from .leg_metrics import PORT_COORDS
+    from .route_map import route_edges, route_map
+    return lambda: route_map(route_edges(df), PORT_COORDS)
+
+
+@benchmark('vessel.network', 'voyages')
+def _network(df):
+    from .route_map import route_edges
+    from .route_network import RouteNetwork, edge_key
+    return lambda: RouteNetwork(edge_key(route_edges(df))).figure()
+
+
+@benchmark('vessel.leg_metrics', 'voyages')
+def _leg_metrics(df):
+    from .leg_metrics import PortTable, leg_metrics
+    ports = PortTable()
+    return lambda: leg_metrics(df, ports)
+
+
+@benchmark('vessel.charts', 'voyages')
+def _charts(df):
+    import plotly.express as px
+    from . import chart_render
+    from .voyages import port_call_counts, port_vessel_counts
+
+    def run():
+        # port call frequency and intersection charts, as vessel.py builds them
+        call_freq = port_call_counts(df)
+        call_freq = chart_render.capped_categories(call_freq, 'Unloading port', 'Calls', by='Vessel')
+        px.bar(call_freq, x='Unloading port', y='Calls', color='Vessel')
+        intersections = port_vessel_counts(df)
+        px.scatter(intersections, x='Unloading port', y='Unique Vessels', size='Unique Vessels')
+        return len(call_freq)
+    return run
+
+
+def _rows(result):
+    if isinstance(result, tuple):
+        result = result[0]
+    if isinstance(result, (int, np.integer)):
+        return int(result)
+    try:
+        return len(result)
+    except TypeError:
+        return None
+
+
+def measure(call, repeat=REPEAT):
+    """Wall times of ``repeat`` runs, then one more run under tracemalloc for peak allocation."""
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = call()
+        seconds.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'seconds': [round(s, 6) for s in seconds],
+        'median_s': round(float(np.median(seconds)), 6),
+        'best_s': round(min(seconds), 6),
+        'peak_mb': round(peak / 2 ** 20, 2),
+        'output_rows': _rows(result),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run(sizes, names=None, repeat=REPEAT, seed=0, log=print):
+    """Run the selected benchmarks at every size; one generated dataset per (schema, size)."""
+    selected = {name: spec for name, spec in BENCHMARKS.items()
+                if not names or any(name == n or name.startswith(f'{n}.') for n in names)}
+    results = []
+    for size in sizes:
+        rows = synthetic.SIZES[size]
+        for schema in dict.fromkeys(schema for schema, _ in selected.values()):
+            start = time.perf_counter()
+            data = synthetic.SCHEMAS[schema](rows, seed=seed)
+            log(f'{schema} x {size}: generated in {time.perf_counter() - start:.2f}s')
+            for name, (bench_schema, setup) in selected.items():
+                if bench_schema != schema:
+                    continue
+                entry = {'name': name, 'schema': schema, 'size': size, 'rows': rows}
+                try:
+                    call = setup(data)
+                    if call is None:
+                        entry['skipped'] = 'not applicable at this size'
+                    else:
+                        entry.update(measure(call, repeat))
+                except Exception as exc:
+                    entry['error'] = f'{type(exc).__name__}: {exc}'
+                results.append(entry)
+                log(f"  {name:<28} {_describe(entry)}")
+            del data
+    return {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'seed': seed,
+        'repeat': repeat,
+        'environment': {
+            'python': platform.python_version(), 'platform': platform.platform(),
+            'cpus': os.cpu_count(), 'pandas': pd.__version__, 'numpy': np.__version__,
+        },
+        'results': results,
+    }
+
+
+def _describe(entry):
+    if 'error' in entry:
+        return f"error: {entry['error']}"
+    if 'skipped' in entry:
+        return f"skipped: {entry['skipped']}"
+    return f"{entry['median_s']:>9.4f}s median  {entry['peak_mb']:>9.1f} MB peak"
+
+
+def save(report, directory=RESULTS_DIR):
+    os.makedirs(directory, exist_ok=True)
+    stamp = report['created'].replace(':', '').replace('-', '').replace('+0000', 'Z')
+    path = os.path.join(directory, f"{stamp}-{report['commit']}.json")
+    with open(path, 'w') as fh:
+        json.dump(report, fh, indent=2)
+    return path
+
+
+def compare(baseline, current, tolerance=TOLERANCE):
+    """Median time and peak memory of ``current`` relative to ``baseline``, per benchmark and size."""
+    def timed(report):
+        return pd.DataFrame([r for r in report['results'] if 'median_s' in r]).set_index(['name', 'size'])
+    old, new = timed(baseline), timed(current)
+    table = old[['median_s', 'peak_mb']].join(new[['median_s', 'peak_mb']], how='inner', lsuffix='_old', rsuffix='_new')
+    table['time_ratio'] = (table['median_s_new'] / table['median_s_old']).round(3)
+    table['memory_ratio'] = (table['peak_mb_new'] / table['peak_mb_old'].where(table['peak_mb_old'] > 0)).round(3)
+    table['regression'] = table['time_ratio'] > 1 + tolerance
+    return table
+
+
+def _load(path):
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m analytics.benchmark',
+                                     description='Benchmark the dashboard hot paths on synthetic data.')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run_p = sub.add_parser('run', help='run benchmarks and write a JSON result file')
+    run_p.add_argument('--sizes', nargs='+', default=['10k', '100k', '1m'], choices=list(synthetic.SIZES))
+    run_p.add_argument('--only', nargs='+', metavar='NAME', help='benchmark names or prefixes, e.g. fifo kpi.aggregations')
+    run_p.add_argument('--repeat', type=int, default=REPEAT)
+    run_p.add_argument('--seed', type=int, default=0)
+    run_p.add_argument('--out', default=RESULTS_DIR)
+    run_p.add_argument('--baseline', help='result file to compare against once the run is done')
+
+    cmp_p = sub.add_parser('compare', help='compare two result files')
+    cmp_p.add_argument('baseline')
+    cmp_p.add_argument('current')
+    for p in (run_p, cmp_p):
+        p.add_argument('--tolerance', type=float, default=TOLERANCE)
+
+    sub.add_parser('list', help='list the benchmarks')
+
+    gen_p = sub.add_parser('generate', help='write one synthetic dataset to a file (.parquet, .csv or .xlsx)')
+    gen_p.add_argument('schema', choices=list(synthetic.SCHEMAS))
+    gen_p.add_argument('size', choices=list(synthetic.SIZES))
+    gen_p.add_argument('path')
+    gen_p.add_argument('--seed', type=int, default=0)
+
+    args = parser.parse_args(argv)
+    if args.command == 'list':
+        for name, (schema, _) in BENCHMARKS.items():
+            print(f'{name:<28} {schema}')
+        return 0
+    if args.command == 'generate':
+        return _generate(args.schema, args.size, args.path, args.seed)
+
+    if args.command == 'run':
+        current = run(args.sizes, args.only, args.repeat, args.seed)
+        print(f'Results written to {save(current, args.out)}')
+        if not args.baseline:
+            return 0
+        baseline = _load(args.baseline)
+    else:
+        baseline, current = _load(args.baseline), _load(args.current)
+    table = compare(baseline, current, args.tolerance)
+    print(table.to_string())
+    # non-zero exit so a scheduled job can flag the run
+    return 1 if table['regression'].any() else 0
+
+
+def _generate(schema, size, path, seed):
+    data = synthetic.SCHEMAS[schema](synthetic.SIZES[size], seed=seed)
+    frames = dict(zip(['Sheet1', 'Mapping'], data)) if isinstance(data, tuple) else {'Sheet1': data}
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.xlsx':
+        if max(len(f) for f in frames.values()) > EXCEL_MAX_ROWS:
+            sys.exit(f'{size} rows do not fit in one Excel sheet; write .parquet or .csv instead')
+        with pd.ExcelWriter(path) as writer:
+            for sheet, frame in frames.items():
+                frame.to_excel(writer, sheet_name='DRY' if schema == 'myt_dry' else sheet, index=False)
+        print(f'Wrote {sum(len(f) for f in frames.values()):,} rows to {path}')
+        return 0
+    stem = os.path.splitext(path)[0]
+    for sheet, frame in frames.items():
+        target = path if sheet == 'Sheet1' else f'{stem}-mapping{ext}'
+        if ext == '.csv':
+            frame.to_csv(target, index=False)
+        elif ext == '.parquet':
+            frame.to_parquet(target, index=False)
+        else:
+            sys.exit(f'Unsupported output type {ext!r}')
+        print(f'Wrote {len(frame):,} rows to {target}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
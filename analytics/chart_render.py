@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+# Rendering budget: roughly one point per horizontal pixel of a wide-layout chart
+CHART_WIDTH_PX = 1200
+# Above this many points, scatter/line traces are drawn with WebGL instead of SVG.
+# Decide on the points a trace really draws: a downsampled series never gets here.
+WEBGL_THRESHOLD = 5_000
+# Heatmap axes are capped to this many rows/columns; the rest are merged into "Other"
+MAX_HEATMAP_AXIS = 40
+# Cell labels are only sent for heatmaps up to this many cells
+MAX_TEXT_CELLS = 400
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: positions of ``n_out`` points that keep the line's shape.
+
+    ``x`` must be sorted; datetimes are compared as integers. The first and
+    last points are always kept.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x)
+    x = (x.astype('datetime64[ns]').astype(np.int64) if np.issubdtype(x.dtype, np.datetime64) else x).astype(float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    picked = np.empty(n_out, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # the next bucket's centroid (or the last point) is the triangle's third corner
+        if i + 2 < len(edges):
+            cx, cy = x[hi:edges[i + 2]].mean(), y[hi:edges[i + 2]].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        picked[i + 1] = a
+    return picked
+
+
+def downsample(df: pd.DataFrame, x, y, width_px=CHART_WIDTH_PX):
+    """``df`` reduced to at most ``width_px`` points along ``x`` with LTTB (rows with no ``y`` dropped)."""
+    if len(df) <= width_px:
+        return df
+    df = df[df[y].notna()].sort_values(x)
+    return df.iloc[lttb(df[x].to_numpy(), df[y].to_numpy(), width_px)]
+
+
+def render_mode(n_points):
+    """``render_mode`` for plotly express scatter/line charts."""
+    return 'webgl' if n_points > WEBGL_THRESHOLD else 'svg'
+
+
+def _cap(totals: pd.Series, limit):
+    # the ``limit - 1`` busiest labels stay; everything else becomes one "Other (k)" label
+    if len(totals) <= limit:
+        return {label: label for label in totals.index}, None
+    keep = totals.nlargest(limit - 1).index
+    other = f'Other ({len(totals) - len(keep)})'
+    return {label: (label if label in keep else other) for label in totals.index}, other
+
+
+def capped_heatmap(table: pd.DataFrame, index, columns, count='Count', total='Delay Sum',
+                   max_rows=MAX_HEATMAP_AXIS, max_cols=MAX_HEATMAP_AXIS):
+    """Average ``total / count`` pivot with both axes capped and clustered.
+
+    The busiest rows/columns (by ``count``) are kept and the rest merged into
+    an "Other" row/column, with exact count-weighted averages. Rows and
+    columns are then ordered by their overall average so similar ones sit
+    next to each other.
+    """
+    table = table[table[count] > 0]
+    for axis, limit in ((index, max_rows), (columns, max_cols)):
+        labels, _ = _cap(table.groupby(axis, observed=True)[count].sum(), limit)
+        table = table.assign(**{axis: table[axis].map(labels).astype(object)})
+    sums = table.groupby([index, columns])[[count, total]].sum()
+    pivot = (sums[total] / sums[count]).unstack(columns).round(2)
+    row_order = (sums.groupby(level=0)[total].sum() / sums.groupby(level=0)[count].sum()).sort_values().index
+    col_order = (sums.groupby(level=1)[total].sum() / sums.groupby(level=1)[count].sum()).sort_values().index
+    return pivot.loc[row_order, col_order]
+
+
+def capped_categories(df: pd.DataFrame, column, value, limit=MAX_HEATMAP_AXIS, by=None):
+    """Bar-chart data with at most ``limit`` ``column`` labels; the rest are summed into "Other"."""
+    labels, other = _cap(df.groupby(column)[value].sum(), limit)
+    if other is None:
+        return df
+    keys = [column] + ([by] if by else [])
+    return df.assign(**{column: df[column].map(labels)}).groupby(keys, as_index=False, sort=False)[value].sum()
+
+
+def text_auto(pivot: pd.DataFrame):
+    """Cell labels for ``px.imshow`` only while the heatmap is small enough to read them."""
+    return pivot.size <= MAX_TEXT_CELLS
@@ -0,0 +1,198 @@
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+from .kpi_engine import TREND_PERIODS
+
+# Activity columns the release planner reads (same as fiforeport.py)
+RELEASE_COLUMNS = ['Container #', 'POL Port', 'POL Agent', 'Size', 'Ageing Days', 'Activity Mode', 'Type', 'Booking']
+
+
+def read_table(path, sheet=None) -> pd.DataFrame:
+    """One sheet of an Excel workbook, or a CSV / Parquet file."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.xlsx', '.xlsm', '.xls'):
+        return pd.read_excel(path, sheet_name=0 if sheet is None else sheet)
+    if ext == '.csv':
+        return pd.read_csv(path)
+    if ext == '.parquet':
+        return pd.read_parquet(path)
+    raise ValueError(f'Unsupported input type {ext!r} ({path})')
+
+
+def write_tables(tables, path):
+    """Write named result tables: one sheet each for .xlsx, else one <stem>-<name> file each."""
+    ext = os.path.splitext(path)[1].lower()
+    written = []
+    if ext == '.xlsx':
+        with pd.ExcelWriter(path, engine='xlsxwriter') as writer:
+            for name, table in tables.items():
+                table.to_excel(writer, sheet_name=name[:31], index=not isinstance(table.index, pd.RangeIndex))
+        return [(path, sum(len(t) for t in tables.values()))]
+    if ext not in ('.csv', '.parquet'):
+        raise ValueError(f'Unsupported output type {ext!r} (use .xlsx, .csv or .parquet)')
+    stem = os.path.splitext(path)[0]
+    for name, table in tables.items():
+        target = path if len(tables) == 1 else f'{stem}-{name}{ext}'
+        table = table if isinstance(table.index, pd.RangeIndex) else table.reset_index()
+        if ext == '.csv':
+            table.to_csv(target, index=False)
+        else:
+            table.rename(columns=str).to_parquet(target, index=False)
+        written.append((target, len(table)))
+    return written
+
+
+def _flat(table):
+    # distribution() and friends return MultiIndex columns; files want flat headers
+    if isinstance(table.columns, pd.MultiIndex):
+        table = table.copy()
+        table.columns = [' '.join(map(str, c)).strip() for c in table.columns]
+    return table
+
+
+def run_fifo(args):
+    from . import fifo_engine
+
+    if args.all_sheets:
+        with open(args.input, 'rb') as fh:
+            df, skipped = fifo_engine.load_all_sheets(fh.read())
+        if skipped:
+            print(f"skipped sheets without the FIFO columns: {', '.join(skipped)}", file=sys.stderr)
+    elif args.input.lower().endswith(('.xlsx', '.xlsm')):
+        df = fifo_engine.stream_sheet(args.input, args.sheet)
+    else:
+        df = read_table(args.input)
+    df = fifo_engine.select(df, args.port, args.category, args.size, args.type)
+    analyse = fifo_engine.analyse_fifo_parallel if args.all_sheets else fifo_engine.analyse_fifo
+    full, summary, exceptions = analyse(df)
+    return {'Summary': summary, 'Exceptions': exceptions, 'Data': full}
+
+
+def _activity(path, sheet, columns=None):
+    from . import snapshot
+
+    if path.lower().endswith(('.xlsx', '.xlsm', '.xls')):
+        if columns is not None:
+            columns = [c for c in columns if c in snapshot.available_columns(path, sheet)]
+        return snapshot.load_activity(path, sheet_name=sheet, columns=columns)
+    df = read_table(path)
+    return df if columns is None else df[[c for c in columns if c in df.columns]]
+
+
+def run_myt(args):
+    from .container_cube import summary_cubes
+
+    cubes = summary_cubes(_activity(args.input, args.sheet))
+    return {name: cube.cube for name, cube in cubes.items()}
+
+
+def run_release(args):
+    from .release_allocator import CONTAINER_TYPES, ReleaseAllocator
+
+    allocator = ReleaseAllocator(_activity(args.input, args.sheet, RELEASE_COLUMNS))
+    if args.batch:
+        allocations, summary = allocator.plan_batch(read_table(args.batch))
+        return {'Allocations': allocations, 'Bookings': summary}
+    if not (args.port and args.size and args.quantity):
+        raise ValueError('release needs --batch, or --port, --size and --quantity')
+    pool = allocator.pool(args.port, args.size, CONTAINER_TYPES.get((args.container_type or '').upper()))
+    agent, rows = pool.release(args.quantity)
+    if rows is None:
+        raise ValueError(f'Only {pool.total} containers available for {args.quantity} requested')
+    return {'Release': rows, 'Agents': pool.agent_summary()}
+
+
+def run_kpi(args):
+    from . import kpi_engine
+
+    kpis = kpi_engine.GroupingSets(kpi_engine.merge_mapping(read_table(args.input, args.sheet),
+                                                            read_table(args.mapping)))
+    tables = {'Totals': kpis.totals().to_frame('Value')}
+    for level in ['subordinate', 'Lead', 'Region', 'POL Port']:
+        tables[level] = kpis.level(level)
+    tables['Trend'] = kpis.trend(args.period)
+    return tables
+
+
+def run_vessel(args):
+    from .leg_metrics import PortTable, leg_metrics, vessel_summary
+    from .route_map import route_edges
+    from .route_network import RouteNetwork, edge_key
+    from .voyages import VOYAGE_COLUMNS, VoyageTable, distribution, read_voyages, round_trips
+
+    if args.input.lower().endswith(('.xlsx', '.xlsm', '.xls')):
+        legs = read_voyages(args.input, args.sheet or 0)
+    else:
+        legs = read_table(args.input)[VOYAGE_COLUMNS].dropna()
+        legs[['Departure', 'Arrival']] = legs[['Departure', 'Arrival']].apply(pd.to_datetime, errors='coerce')
+    legs = VoyageTable(legs).legs
+    cycles, calls = round_trips(legs, args.home)
+    metrics = leg_metrics(legs, PortTable())
+    edges = route_edges(legs)
+    return {
+        'Round Trips': cycles,
+        'Cycle Times': _flat(distribution(cycles, 'Vessel', ['Cycle Days', 'Sea Days', 'Dwell Days'])),
+        'Port Dwell': _flat(distribution(calls, 'Next Port', ['Dwell Days'])),
+        'Leg Metrics': metrics,
+        'Vessels': vessel_summary(metrics),
+        'Routes': edges,
+        'Ports': RouteNetwork(edge_key(edges)).metrics,
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m analytics',
+        description='Run a dashboard analysis over a file and write its tables (.xlsx, .csv or .parquet).')
+    sub = parser.add_subparsers(dest='analysis', required=True)
+
+    def command(name, run, help, sheet=None):
+        p = sub.add_parser(name, help=help)
+        p.add_argument('input')
+        p.add_argument('-o', '--output', required=True, help='.xlsx (one sheet per table), .csv or .parquet')
+        p.add_argument('--sheet', default=sheet)
+        p.set_defaults(run=run)
+        return p
+
+    fifo = command('fifo', run_fifo, 'FIFO compliance of a MYT sheet (fifo.py)', sheet='DRY')
+    fifo.add_argument('--all-sheets', action='store_true', help='every sheet, analysed in parallel')
+    fifo.add_argument('--port')
+    fifo.add_argument('--category')
+    fifo.add_argument('--size')
+    fifo.add_argument('--type', nargs='+')
+
+    command('myt', run_myt, 'MYT / On The Way / Utilized count cubes (mty.py)', sheet='Sheet1')
+
+    release = command('release', run_release, 'release planning (fiforeport.py)', sheet=0)
+    release.add_argument('--batch', help='booking requests file (Booking, POL Port, Size, Container Type, Quantity)')
+    release.add_argument('--port')
+    release.add_argument('--size')
+    release.add_argument('--container-type', help='DRY or SPECIAL; any type when omitted')
+    release.add_argument('--quantity', type=int)
+
+    kpi = command('kpi', run_kpi, 'delay KPIs per level plus trend ("inventory kpi.py")')
+    kpi.add_argument('--mapping', required=True, help='POL-Port mapping file')
+    kpi.add_argument('--period', default='Daily', choices=list(TREND_PERIODS))
+
+    vessel = command('vessel', run_vessel, 'round trips, leg metrics and port network (vessel.py)')
+    vessel.add_argument('--home', default='NOVOROSSIYSK', help='home port for round trips')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    start = time.perf_counter()
+    try:
+        tables = args.run(args)
+        written = write_tables(tables, args.output)
+    except (ValueError, KeyError, FileNotFoundError) as exc:
+        print(f'error: {exc}', file=sys.stderr)
+        return 2
+    for path, rows in written:
+        print(f'{path}: {rows:,} rows')
+    print(f'{args.analysis} done in {time.perf_counter() - start:.2f}s')
+    return 0
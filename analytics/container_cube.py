@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+from . import instrument
+
+# "Select Container Type" option -> Type values, shared by every mty.py tab
+TYPE_GROUPS = {
+    "Dry": ['Heavy Duty', 'Hi-Cube'],
+    "Special": ['Flat Rack', 'Open Top'],
+    "Reefer": ['Reefer'],
+    "ISO": ['Standard'],
+}
+
+# Activities counted as utilization on the mty.py Utilized tab
+UTILIZE_ACTIVITIES = {
+    "Import Utilize": ['DISCHARGE FULL', 'SENT TO CONSIGNEE'],
+    "Export Utilize": ['SENT TO SHIPPER', 'RECEIVE FROM SHIPPER'],
+}
+
+
+def type_group(types: pd.Series) -> pd.Series:
+    lookup = {t: group for group, members in TYPE_GROUPS.items() for t in members}
+    return types.map(lookup).astype('category')
+
+
+class CountCube:
+    """Container # counts pre-aggregated over a fixed set of dimensions.
+
+    Built once per data snapshot; a tab's pivot is then a mask over the
+    (small) cube plus a groupby on it, never a pass over the raw rows.
+    """
+
+    def __init__(self, rows: pd.DataFrame, dims):
+        rows = rows.assign(**{'Type Group': type_group(rows['Type'])})
+        self.dims = list(dims)
+        self.cube = (rows.groupby(self.dims, observed=True, dropna=False)['Container #']
+                         .count().rename('Count').reset_index())
+
+    def slice(self, filters):
+        """Cube rows matching ``filters`` ({dim: value or list}; None skips the dim)."""
+        mask = np.ones(len(self.cube), dtype=bool)
+        for col, values in filters.items():
+            if values is None:
+                continue
+            if isinstance(values, str) or not pd.api.types.is_list_like(values):
+                values = [values]
+            mask &= self.cube[col].isin(values).to_numpy()
+        return self.cube[mask]
+
+    @instrument.timed('cube pivot', 'aggregate')
+    def pivot(self, index, filters, columns='Size'):
+        """Same table as ``pd.pivot_table(..., aggfunc='count')`` plus Grand Total row/column."""
+        sliced = self.slice(filters)
+        pivot = (sliced.groupby([index, columns], observed=True)['Count'].sum()
+                       .unstack(columns, fill_value=0))
+        pivot['Grand Total'] = pivot.sum(axis=1)
+        pivot.loc['Grand Total'] = pivot.sum()
+        return pivot
+
+
+@instrument.timed('build cubes', 'aggregate')
+def summary_cubes(data: pd.DataFrame):
+    """The mty.py cubes, one per tab, over just the dimensions that tab filters and pivots on."""
+    all_utilize = sum(UTILIZE_ACTIVITIES.values(), [])
+    return {
+        'myt': CountCube(data[data['Activity Mode'] == 'Empty'],
+                         ['Type Group', 'Region Name', 'POL Port', 'Company', 'POL Agent', 'Size']),
+        'on_the_way': CountCube(data[data['Activity Mode'] == 'On The Way'],
+                                ['Type Group', 'POFD Port', 'Company', 'POFD Agent', 'Size']),
+        'utilized': CountCube(data[data['Activity'].isin(all_utilize)],
+                              ['Activity', 'Type Group', 'Region Name', 'POL Port', 'Company', 'POL Agent', 'Size']),
+    }
+
+
+# Raw rows behind each mty.py summary ("ALL" skips a filter), for downloads and drill-downs.
+# isin like CountCube.slice, so a NaN selection (e.g. blank Company) matches the pivot.
+def myt_rows(data, region, pol, company, container_type):
+    rows = data[(data['Activity Mode'] == 'Empty') & data['Type'].isin(TYPE_GROUPS[container_type])]
+    rows = rows[rows['Region Name'].isin([region])]
+    if pol != "ALL":
+        rows = rows[rows['POL Port'].isin([pol])]
+    if company != "ALL":
+        rows = rows[rows['Company'].isin([company])]
+    return rows
+
+
+def on_the_way_rows(data, pofd_ports, company, container_type):
+    rows = data[(data['Activity Mode'] == 'On The Way') & data['Type'].isin(TYPE_GROUPS[container_type])]
+    rows = rows[rows['POFD Port'].isin(pofd_ports)]
+    if company != "ALL":
+        rows = rows[rows['Company'].isin([company])]
+    return rows
+
+
+def utilized_rows(data, activities, region, pol, company, container_type):
+    rows = data[data['Activity'].isin(activities) & data['Type'].isin(TYPE_GROUPS[container_type])]
+    rows = rows[rows['Region Name'].isin([region])]
+    if pol != "ALL":
+        rows = rows[rows['POL Port'].isin([pol])]
+    if company != "ALL":
+        rows = rows[rows['Company'].isin([company])]
+    return rows
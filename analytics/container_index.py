@@ -0,0 +1,105 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# ISO 6346: owner code (3 letters) + category (U/J/Z) + serial (6 digits) + check digit
+ISO6346_PATTERN = r'[A-Z]{3}[UJZ]\d{7}'
+
+# Letter values skip multiples of 11 (A=10, B=12 ... K=21, L=23 ... U=32, V=34 ...)
+_CHAR_VALUE = np.zeros(256, dtype=np.int64)
+_value = 10
+for _letter in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ':
+    if _value % 11 == 0:
+        _value += 1
+    _CHAR_VALUE[ord(_letter)] = _value
+    _value += 1
+for _digit in range(10):
+    _CHAR_VALUE[ord('0') + _digit] = _digit
+_WEIGHTS = 2 ** np.arange(10, dtype=np.int64)
+
+
+def normalise(numbers) -> pd.Series:
+    """Upper-case container numbers and drop spaces, dashes and dots ("trlu 673164-8" -> "TRLU6731648")."""
+    numbers = pd.Series(numbers, dtype=object)
+    numbers = numbers.where(numbers.isna(), numbers.astype(str))
+    return numbers.str.upper().str.replace(r'[\s\-.]', '', regex=True)
+
+
+def split_input(text: str):
+    """Container numbers pasted as comma, space, semicolon or newline separated text."""
+    return [token for token in re.split(r'[,;\s]+', text) if token]
+
+
+def check_digits(numbers: pd.Series) -> pd.DataFrame:
+    """Vectorised ISO 6346 validation of normalised container numbers.
+
+    Returns "Valid Format", "Expected Check Digit" (for well-formed numbers)
+    and "Valid" (format and check digit both correct) per input.
+    """
+    numbers = pd.Series(numbers, dtype=object).reset_index(drop=True)
+    well_formed = numbers.str.fullmatch(ISO6346_PATTERN).fillna(False).to_numpy(dtype=bool)
+    expected = np.full(len(numbers), -1, dtype=np.int64)
+    valid = np.zeros(len(numbers), dtype=bool)
+    if well_formed.any():
+        raw = ''.join(numbers[well_formed]).encode('ascii')
+        chars = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 11)
+        digit = (_CHAR_VALUE[chars[:, :10]] @ _WEIGHTS) % 11 % 10
+        expected[well_formed] = digit
+        valid[well_formed] = digit == (chars[:, 10] - ord('0'))
+    return pd.DataFrame({
+        'Valid Format': well_formed,
+        'Expected Check Digit': pd.Series(expected).where(well_formed).astype('Int64'),
+        'Valid': valid,
+    })
+
+
+class ContainerIndex:
+    """Lookup index over the normalised container numbers of a frame.
+
+    Rows are sorted by key once (then by ``then_by`` within a key, if given).
+    A hash map (``pd.Index``) turns a batch of exact queries into group ids
+    in one vectorised call, and the sorted key array answers prefix queries
+    with two binary searches.
+    """
+
+    def __init__(self, df: pd.DataFrame, column='Container #', then_by=None):
+        self.df = df
+        keys = normalise(df[column]).fillna('').to_numpy(dtype=str)
+        if then_by is None:
+            self.order = np.argsort(keys, kind='stable')
+        else:
+            then = df[then_by]
+            if pd.api.types.is_datetime64_any_dtype(then):
+                # NaT as the smallest int64, so undated rows sort first and never end a group
+                then = then.to_numpy(dtype='datetime64[ns]').view(np.int64)
+            self.order = np.lexsort((np.asarray(then), keys))
+        sorted_keys = keys[self.order]
+        boundaries = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]) if len(keys) else np.array([], int)
+        self.keys = sorted_keys[boundaries]
+        self.starts = boundaries
+        self.ends = np.r_[boundaries[1:], len(keys)] if len(keys) else boundaries
+        self._hash = pd.Index(self.keys)
+
+    def _rows(self, groups):
+        if not len(groups):
+            return self.df.iloc[[]]
+        starts, ends = self.starts[groups], self.ends[groups]
+        lengths = ends - starts
+        # expand [start, end) ranges without a Python loop
+        offsets = np.repeat(starts - np.r_[0, np.cumsum(lengths)[:-1]], lengths)
+        positions = self.order[np.arange(lengths.sum()) + offsets]
+        return self.df.iloc[positions]
+
+    def lookup(self, numbers):
+        """Rows for exact matches, and the normalised numbers that were not found."""
+        queries = normalise(numbers).drop_duplicates().to_numpy(dtype=str)
+        groups = self._hash.get_indexer(queries)
+        return self._rows(groups[groups >= 0]), queries[groups < 0].tolist()
+
+    def prefix(self, prefix):
+        """Rows whose container number starts with ``prefix``."""
+        prefix = normalise([prefix]).iloc[0]
+        lo = np.searchsorted(self.keys, prefix, side='left')
+        hi = np.searchsorted(self.keys, prefix + '\uffff', side='left')
+        return self._rows(np.arange(lo, hi))
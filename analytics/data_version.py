@@ -0,0 +1,76 @@
+import logging
+import os
+import threading
+
+from . import snapshot
+
+POLL_SECONDS = 2.0
+
+log = logging.getLogger(__name__)
+
+
+def _signature(paths):
+    # (size, mtime) of every source workbook and of its delta store manifest, if any
+    signature = []
+    for path in paths:
+        for candidate in (path, os.path.join(snapshot.store_dir(path), 'manifest.json')):
+            try:
+                st = os.stat(candidate)
+                signature.append((candidate, st.st_size, st.st_mtime_ns))
+            except FileNotFoundError:
+                signature.append((candidate, None, None))
+    return tuple(signature)
+
+
+class DataWatcher:
+    """Monotonically increasing data-version token for a set of source files.
+
+    Caches take ``token`` as an argument, so a new token is a new cache
+    entry. When a source changes, the registered warm-up callbacks are run
+    in the watcher thread with the next token *before* it is published:
+    users keep getting the previous version's warm caches until the new
+    ones are ready, and never trigger the re-parse themselves.
+    """
+
+    def __init__(self, paths, poll=POLL_SECONDS):
+        self.paths = list(paths)
+        self.poll = poll
+        self.token = 1
+        self._signature = _signature(self.paths)
+        self._warmers = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def on_change(self, warm):
+        """Register ``warm(token)``, run for every new version before it is published."""
+        self._warmers.append(warm)
+        return warm
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='data-version-watcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def check(self):
+        """Poll once; returns True when a new version was published."""
+        signature = _signature(self.paths)
+        if signature == self._signature:
+            return False
+        token = self.token + 1
+        for warm in self._warmers:
+            try:
+                warm(token)
+            except Exception:
+                # a failed warm-up only means the first request rebuilds that cache
+                log.exception('Warm rebuild for data version %s failed', token)
+        self._signature = signature
+        self.token = token
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.poll):
+            self.check()
@@ -0,0 +1,205 @@
+import glob
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# A row's identity: the container, the activity and when it happened
+KEY_COLUMNS = ['Container #', 'Activity', 'Activity Date']
+BUCKETS = 16
+# Deltas kept before a sync starts a background compaction
+COMPACT_AFTER = 8
+
+
+def _atomic_write(path, write):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _try_lock(fh):
+    # OS advisory lock: released by the kernel when the holder exits, is killed or the machine reboots
+    try:
+        if fcntl is not None:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def row_keys(df: pd.DataFrame) -> np.ndarray:
+    """64-bit hash of the key columns plus the occurrence number among identical keys."""
+    key_columns = [c for c in KEY_COLUMNS if c in df.columns]
+    keys = df[key_columns].astype(str).assign(_occurrence=df.groupby(key_columns, dropna=False).cumcount())
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+
+class DeltaStore:
+    """Row-level change log of one workbook sheet, as bucketed Parquet files.
+
+    ``sync`` diffs a fresh extract against the key -> row hash state of the
+    last sync and writes only inserted/changed rows to
+    ``deltas/seq=N/bucket=B.parquet`` and the deleted keys to
+    ``deltas/seq=N/deletes.parquet``. ``read`` replays the deltas newer
+    than the compacted base; ``compact`` folds them into ``base/`` bucket by
+    bucket. The sequence number only moves when data changes, so it doubles
+    as the data version.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.manifest_path = os.path.join(root, 'manifest.json')
+        self.state_path = os.path.join(root, 'state.parquet')
+
+    @staticmethod
+    def exists(root):
+        return os.path.exists(os.path.join(root, 'manifest.json'))
+
+    def manifest(self):
+        try:
+            with open(self.manifest_path) as fh:
+                return json.load(fh)
+        except FileNotFoundError:
+            return {'seq': 0, 'compacted_seq': 0, 'sheet': None}
+
+    def _write_manifest(self, manifest):
+        def write(tmp):
+            with open(tmp, 'w') as fh:
+                json.dump(manifest, fh)
+        _atomic_write(self.manifest_path, write)
+
+    @property
+    def version(self):
+        return self.manifest()['seq']
+
+    def pending_deltas(self):
+        manifest = self.manifest()
+        return manifest['seq'] - manifest['compacted_seq']
+
+    def sync(self, df: pd.DataFrame, sheet=None):
+        """Append the difference between ``df`` and the last sync; returns the change counts."""
+        keys = row_keys(df)
+        rows = pd.util.hash_pandas_object(df, index=False).to_numpy()
+        if os.path.exists(self.state_path):
+            state = pd.read_parquet(self.state_path)
+            previous_keys, previous_rows = pd.Index(state['_key'].to_numpy()), state['_row'].to_numpy()
+        else:
+            previous_keys, previous_rows = pd.Index([], dtype=np.uint64), np.array([], dtype=np.uint64)
+        position = previous_keys.get_indexer(keys)
+        known = position >= 0
+        upsert = ~known | (previous_rows[np.where(known, position, 0)] != rows) if len(previous_rows) else ~known
+        deleted = previous_keys.difference(keys).to_numpy()
+        changes = {'inserted': int((~known).sum()), 'updated': int((known & upsert).sum()),
+                   'deleted': len(deleted), 'seq': None}
+        if not upsert.any() and not len(deleted):
+            return changes
+
+        manifest = self.manifest()
+        seq = manifest['seq'] + 1
+        folder = os.path.join(self.root, 'deltas', f'seq={seq:06d}')
+        delta = df[upsert].assign(_key=keys[upsert])
+        for bucket, part in delta.groupby(delta['_key'] % BUCKETS):
+            _atomic_write(os.path.join(folder, f'bucket={bucket:02d}.parquet'),
+                          lambda tmp: part.to_parquet(tmp, index=False))
+        if len(deleted):
+            _atomic_write(os.path.join(folder, 'deletes.parquet'),
+                          lambda tmp: pd.DataFrame({'_key': deleted}).to_parquet(tmp, index=False))
+        _atomic_write(self.state_path, lambda tmp: pd.DataFrame({'_key': keys, '_row': rows}).to_parquet(tmp, index=False))
+        # the manifest goes last: until it moves, readers never look at the new delta
+        manifest.update(seq=seq, sheet=manifest['sheet'] if sheet is None else sheet)
+        self._write_manifest(manifest)
+        changes['seq'] = seq
+        return changes
+
+    def _deletes(self, manifest):
+        # key -> sequence of its latest delete, over the uncompacted deltas
+        parts = []
+        for seq in range(manifest['compacted_seq'] + 1, manifest['seq'] + 1):
+            path = os.path.join(self.root, 'deltas', f'seq={seq:06d}', 'deletes.parquet')
+            if os.path.exists(path):
+                parts.append(pd.read_parquet(path).assign(_seq=seq))
+        if not parts:
+            return pd.Series(dtype=np.int64)
+        return pd.concat(parts).groupby('_key')['_seq'].max()
+
+    def _bucket(self, bucket, manifest, deletes):
+        parts = []
+        base = os.path.join(self.root, 'base', f'bucket={bucket:02d}.parquet')
+        if os.path.exists(base):
+            parts.append(pd.read_parquet(base).assign(_seq=0))
+        for seq in range(manifest['compacted_seq'] + 1, manifest['seq'] + 1):
+            path = os.path.join(self.root, 'deltas', f'seq={seq:06d}', f'bucket={bucket:02d}.parquet')
+            if os.path.exists(path):
+                parts.append(pd.read_parquet(path).assign(_seq=seq))
+        if not parts:
+            return None
+        rows = pd.concat(parts, ignore_index=True).sort_values('_seq', kind='stable')
+        rows = rows.drop_duplicates('_key', keep='last')
+        # a row survives unless its key was deleted after it was last written
+        deleted_at = deletes.reindex(rows['_key'].to_numpy()).to_numpy()
+        return rows[~(deleted_at >= rows['_seq'].to_numpy())].drop(columns='_seq')
+
+    def read(self, columns=None) -> pd.DataFrame:
+        """Current rows: the compacted base with newer deltas replayed on top."""
+        manifest = self.manifest()
+        deletes = self._deletes(manifest)
+        parts = [self._bucket(b, manifest, deletes) for b in range(BUCKETS)]
+        parts = [p for p in parts if p is not None]
+        if not parts:
+            return pd.DataFrame(columns=columns)
+        df = pd.concat(parts, ignore_index=True).drop(columns='_key')
+        return df if columns is None else df[[c for c in columns if c in df.columns]]
+
+    def compact(self):
+        """Fold every delta into the base, bucket by bucket; a lock keeps one compactor at a time."""
+        lock = open(os.path.join(self.root, 'compact.lock'), 'a+')
+        if not _try_lock(lock):
+            lock.close()
+            return False
+        try:
+            manifest = self.manifest()
+            deletes = self._deletes(manifest)
+            for bucket in range(BUCKETS):
+                rows = self._bucket(bucket, manifest, deletes)
+                path = os.path.join(self.root, 'base', f'bucket={bucket:02d}.parquet')
+                if rows is not None:
+                    _atomic_write(path, lambda tmp: rows.to_parquet(tmp, index=False))
+            # re-read: a sync may have advanced seq while we compacted
+            current = self.manifest()
+            current['compacted_seq'] = manifest['seq']
+            self._write_manifest(current)
+            for seq in range(1, manifest['seq'] + 1):
+                for path in glob.glob(os.path.join(self.root, 'deltas', f'seq={seq:06d}', '*.parquet')):
+                    os.remove(path)
+                try:
+                    os.rmdir(os.path.join(self.root, 'deltas', f'seq={seq:06d}'))
+                except OSError:
+                    pass
+            return True
+        finally:
+            lock.close()
+
+    def compact_in_background(self):
+        """Run ``compact`` in a detached process so the sync returns immediately."""
+        return subprocess.Popen([sys.executable, os.path.abspath(__file__), 'compact', self.root],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3 and sys.argv[1] == 'compact':
+        DeltaStore(sys.argv[2]).compact()
+    else:
+        sys.exit(f'usage: {sys.argv[0]} compact STORE_DIR')
@@ -0,0 +1,112 @@
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+import pandas as pd
+import xlsxwriter
+
+from . import instrument
+
+# Download format -> (file extension, MIME type)
+FORMATS = {
+    "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+CACHE_BYTES = 256 * 1024 * 1024
+_ROWS_PER_CHUNK = 10_000
+# Data rows per worksheet: Excel's 1,048,576-row limit minus the header row
+EXCEL_SHEET_ROWS = 1_048_575
+
+
+def write_excel(df: pd.DataFrame, include_index: bool = False) -> bytes:
+    """Write ``df`` to xlsx with xlsxwriter in constant-memory mode.
+
+    Rows are flushed to disk as they are written, so the workbook object
+    never holds more than one row however large the extract is. Extracts
+    longer than one sheet continue on Sheet2, Sheet3, ... each with the
+    header row, since xlsxwriter silently drops rows past the limit.
+    """
+    if include_index:
+        df = df.reset_index()
+    output = BytesIO()
+    workbook = xlsxwriter.Workbook(output, {
+        'constant_memory': True,
+        'default_date_format': 'yyyy-mm-dd hh:mm:ss',
+        'remove_timezone': True,
+    })
+    header = [str(c) for c in df.columns]
+    for sheet_start in range(0, max(len(df), 1), EXCEL_SHEET_ROWS):
+        sheet = workbook.add_worksheet(f'Sheet{sheet_start // EXCEL_SHEET_ROWS + 1}')
+        sheet.write_row(0, 0, header)
+        row = 1
+        sheet_end = min(sheet_start + EXCEL_SHEET_ROWS, len(df))
+        for start in range(sheet_start, sheet_end, _ROWS_PER_CHUNK):
+            chunk = df.iloc[start:min(start + _ROWS_PER_CHUNK, sheet_end)]
+            # NaN/NaT -> blank cell; object dtype gives plain Python values
+            chunk = chunk.astype(object).where(chunk.notna(), None)
+            for values in chunk.itertuples(index=False, name=None):
+                sheet.write_row(row, 0, values)
+                row += 1
+    workbook.close()
+    return output.getvalue()
+
+
+def to_bytes(df: pd.DataFrame, fmt: str, include_index: bool = False) -> bytes:
+    if fmt == "Excel":
+        return write_excel(df, include_index)
+    if fmt == "CSV":
+        return df.to_csv(index=include_index).encode('utf-8')
+    if fmt == "Parquet":
+        output = BytesIO()
+        df.rename(columns=str).to_parquet(output, index=include_index)
+        return output.getvalue()
+    raise ValueError(f"Unknown export format {fmt!r}")
+
+
+class ExportCache:
+    """Finished export files by filter signature, least recently used evicted first."""
+
+    def __init__(self, max_bytes=CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._files = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, signature, build):
+        with self._lock:
+            if signature in self._files:
+                self._files.move_to_end(signature)
+                return self._files[signature]
+        data = build()
+        with self._lock:
+            if signature not in self._files:
+                self._files[signature] = data
+                self._size += len(data)
+            while self._size > self.max_bytes and len(self._files) > 1:
+                _, dropped = self._files.popitem(last=False)
+                self._size -= len(dropped)
+        return data
+
+
+# Shared by every page in the process; Streamlit re-executes page scripts but not imports
+cache = ExportCache()
+
+
+def _build(build_frame, fmt, include_index):
+    with instrument.stage('filter rows', 'filter') as rows:
+        df = build_frame()
+        rows.rows = len(df)
+    with instrument.stage(f'export {fmt}', 'export', rows=len(df)):
+        return to_bytes(df, fmt, include_index)
+
+
+def lazy_export(signature, build_frame, fmt, include_index=False):
+    """Zero-argument callable for ``st.download_button(data=...)``.
+
+    Nothing is filtered or written until the user actually clicks download;
+    repeated clicks with the same ``signature`` reuse the cached file.
+    """
+    return lambda: cache.get(tuple(signature) + (fmt, include_index),
+                             lambda: _build(build_frame, fmt, include_index))
@@ -0,0 +1,240 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+import numpy as np
+import openpyxl
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# A box can only block boxes of the same agent / port / category / size / type
+FIFO_KEYS = ["POL Agent", "POL Port", "Category", "Size", "Type"]
+SUMMARY_KEYS = ["POL Port", "POL Agent"]
+
+# Below this many rows the process start-up costs more than it saves
+PARALLEL_MIN_ROWS = 50_000
+
+# Columns the FIFO analysis actually reads; the streaming loader keeps only these
+FIFO_COLUMNS = ["Container #"] + FIFO_KEYS + ["IN DATE", "OUT DATE"]
+STREAM_CHUNK_ROWS = 50_000
+
+
+def stream_sheet(file, sheet: str, chunk_rows: int = STREAM_CHUNK_ROWS, progress=None) -> pd.DataFrame:
+    """Load one MYT sheet row by row with openpyxl in read-only mode.
+
+    Only ``FIFO_COLUMNS`` are kept and rows without an IN DATE are dropped as
+    they are read. Each chunk of ``chunk_rows`` rows is turned into parsed
+    dates and category codes straight away, so memory holds one chunk of raw
+    cell values at a time. ``progress(rows_read, total_rows)`` is called once
+    per chunk; ``total_rows`` is None when the sheet does not declare its size.
+    """
+    wb = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet]
+        rows = ws.iter_rows(values_only=True)
+        header = _header(next(rows, ()))
+        missing = [c for c in FIFO_COLUMNS if c not in header]
+        if missing:
+            raise KeyError(f"Sheet {sheet!r} has no column(s) {missing}")
+        idx = [header.index(c) for c in FIFO_COLUMNS]
+        in_pos = FIFO_COLUMNS.index("IN DATE")
+        total = ws.max_row - 1 if ws.max_row else None
+
+        chunks, buf, read = [], [], 0
+        for row in rows:
+            read += 1
+            values = [row[i] if i < len(row) else None for i in idx]
+            if values[in_pos] is not None and values[in_pos] != "":
+                buf.append(values)
+            if len(buf) >= chunk_rows:
+                chunks.append(_chunk_frame(buf))
+                buf = []
+                if progress:
+                    progress(read, total)
+        if buf or not chunks:
+            chunks.append(_chunk_frame(buf))
+        if progress:
+            progress(read, read)
+    finally:
+        wb.close()
+
+    return pd.DataFrame({
+        col: (union_categoricals([c[col] for c in chunks], sort_categories=True)
+              if col in FIFO_KEYS else pd.concat([c[col] for c in chunks], ignore_index=True))
+        for col in FIFO_COLUMNS
+    })
+
+
+def _header(row):
+    return [str(c).strip() if c is not None else "" for c in row]
+
+
+def _chunk_frame(rows) -> pd.DataFrame:
+    cols = list(zip(*rows)) if rows else [()] * len(FIFO_COLUMNS)
+    chunk = {}
+    for name, values in zip(FIFO_COLUMNS, cols):
+        if name in FIFO_KEYS:
+            chunk[name] = _key_codes(values)
+        elif name in ("IN DATE", "OUT DATE"):
+            chunk[name] = pd.Series(pd.to_datetime(pd.Series(values, dtype=object), errors="coerce"))
+        else:
+            chunk[name] = pd.Series(values, dtype=object)
+    # IN DATE values that were present but not parseable
+    keep = chunk["IN DATE"].notna().to_numpy()
+    return {k: v[keep] if isinstance(v, pd.Categorical) else v[keep].reset_index(drop=True)
+            for k, v in chunk.items()}
+
+
+def _key_codes(values) -> pd.Categorical:
+    # Every chunk gets str values in object categories, so union_categoricals
+    # never sees a blank-only chunk or a Size column mixing 20 and "40'"
+    values = [None if v is None else str(v) for v in values]
+    categories = pd.Index(sorted({v for v in values if v is not None}), dtype=object)
+    return pd.Categorical(values, categories=categories)
+
+
+def fifo_status(df: pd.DataFrame) -> pd.DataFrame:
+    """Return "FIFO Status" / "FIFO Break Reason" for every row of ``df``.
+
+    A released box breaks FIFO when an older box of its group is still in
+    depot. Only the oldest in-depot IN DATE per group matters, so a single
+    grouped min replaces the per-row scan over the whole frame.
+    """
+    in_depot = df["OUT DATE"].isna()
+    depot_in_dates = df["IN DATE"].where(in_depot)
+    keys = [df[k] for k in FIFO_KEYS]
+    oldest_in_depot = depot_in_dates.groupby(keys, dropna=True, observed=True).transform("min")
+
+    blocked = ~in_depot & (oldest_in_depot < df["IN DATE"])
+
+    status = pd.Series(
+        np.select([in_depot, blocked], ["In Depot", "No"], default="Yes"),
+        index=df.index, dtype=object,
+    )
+    reason = pd.Series("Released in FIFO order", index=df.index, dtype=object)
+    reason[in_depot] = "Still in depot"
+    reason[blocked] = ("Older box still in depot (IN < "
+                       + oldest_in_depot[blocked].dt.strftime("%Y-%m-%d") + ")")
+    return pd.DataFrame({"FIFO Status": status, "FIFO Break Reason": reason})
+
+
+def _count_status(df: pd.DataFrame) -> pd.DataFrame:
+    status = df["FIFO Status"]
+    flags = pd.DataFrame({
+        "In Depot": (status == "In Depot").astype(int),
+        "No": (status == "No").astype(int),
+        "Yes": (status == "Yes").astype(int),
+    })
+    return flags.groupby([df[k] for k in SUMMARY_KEYS], dropna=False, observed=True).sum()
+
+
+def _finish_summary(counts: pd.DataFrame) -> pd.DataFrame:
+    summary = counts.copy()
+    summary["Released"] = summary["Yes"] + summary["No"]
+    pct = (summary["Yes"] / summary["Released"].where(summary["Released"] > 0) * 100).round(2)
+    summary["FIFO %"] = pct.fillna(0)
+    return (summary.reset_index()
+                   .sort_values(["POL Port", "FIFO %"], ascending=[True, False]))
+
+
+def summarise_fifo(df: pd.DataFrame) -> pd.DataFrame:
+    """Agent-port summary of a frame that already carries "FIFO Status"."""
+    return _finish_summary(_count_status(df))
+
+
+def select(df: pd.DataFrame, port=None, category=None, size=None, types=None) -> pd.DataFrame:
+    """Rows for one fifo.py sidebar selection; None (or port "All") skips that filter."""
+    mask = np.ones(len(df), dtype=bool)
+    if port not in (None, "All"):
+        mask &= (df["POL Port"] == port).to_numpy()
+    if category is not None:
+        mask &= (df["Category"] == category).to_numpy()
+    if size is not None:
+        mask &= (df["Size"] == size).to_numpy()
+    if types is not None:
+        mask &= df["Type"].isin(types).to_numpy()
+    return df[mask]
+
+
+def analyse_fifo(df: pd.DataFrame):
+    df = df.copy()
+    df[["FIFO Status", "FIFO Break Reason"]] = fifo_status(df)
+    summary = summarise_fifo(df)
+    exceptions = df[df["FIFO Status"] == "No"].copy()
+    return df, summary, exceptions
+
+
+# ------------------------------
+# Parallel mode: every sheet, partitions by (POL Port, POL Agent)
+# ------------------------------
+
+def _pool(workers):
+    # spawn, not fork: the Streamlit server process is multi-threaded
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def _read_sheet(data: bytes, sheet: str) -> pd.DataFrame:
+    return stream_sheet(BytesIO(data), sheet).assign(Sheet=sheet)
+
+
+def load_all_sheets(data: bytes, workers: int = None):
+    """Load and clean every sheet of a MYT workbook, one process per sheet.
+
+    Sheets without the ``FIFO_COLUMNS`` header (Summary, pivots, notes) are
+    left out. Returns ``(df, skipped)`` with the names of those sheets.
+    """
+    wb = openpyxl.load_workbook(BytesIO(data), read_only=True)
+    try:
+        sheets, skipped = [], []
+        for ws in wb.worksheets:
+            header = _header(next(ws.iter_rows(max_row=1, values_only=True), ()))
+            (sheets if set(FIFO_COLUMNS) <= set(header) else skipped).append(ws.title)
+    finally:
+        wb.close()
+    if not sheets:
+        raise KeyError(f"No sheet has the FIFO columns {FIFO_COLUMNS}")
+    workers = min(workers or os.cpu_count() or 1, len(sheets))
+    with _pool(workers) as pool:
+        frames = list(pool.map(_read_sheet, [data] * len(sheets), sheets))
+    return pd.concat(frames, ignore_index=True), skipped
+
+
+def _analyse_partition(part: pd.DataFrame):
+    status = fifo_status(part)
+    return status, _count_status(part.assign(**{"FIFO Status": status["FIFO Status"]}))
+
+
+def _partition(df: pd.DataFrame, chunks: int):
+    """Split ``df`` into at most ``chunks`` frames of whole (POL Port, POL Agent) groups."""
+    group_ids = df.groupby(SUMMARY_KEYS, dropna=False, observed=True, sort=False).ngroup().to_numpy()
+    sizes = np.bincount(group_ids)
+    # largest groups first, each onto the currently lightest chunk
+    load = np.zeros(chunks, dtype=np.int64)
+    chunk_of_group = np.empty(len(sizes), dtype=np.int64)
+    for g in np.argsort(-sizes, kind="stable"):
+        target = load.argmin()
+        chunk_of_group[g] = target
+        load[target] += sizes[g]
+    chunk_ids = chunk_of_group[group_ids]
+    return [df[chunk_ids == c] for c in range(chunks) if load[c]]
+
+
+def analyse_fifo_parallel(df: pd.DataFrame, workers: int = None, min_rows: int = PARALLEL_MIN_ROWS):
+    """Same result as ``analyse_fifo``, with the partitions analysed in a process pool."""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(df) < min_rows:
+        return analyse_fifo(df)
+
+    df = df.copy()
+    cols = FIFO_KEYS + ["IN DATE", "OUT DATE"]
+    parts = _partition(df[cols].reset_index(drop=True), workers * 4)
+    with _pool(workers) as pool:
+        results = list(pool.map(_analyse_partition, parts))
+
+    status = pd.concat([r[0] for r in results]).sort_index()
+    df[["FIFO Status", "FIFO Break Reason"]] = status.set_axis(df.index)
+    counts = pd.concat([r[1] for r in results]).sort_index()
+    summary = _finish_summary(counts)
+    exceptions = df[df["FIFO Status"] == "No"].copy()
+    return df, summary, exceptions
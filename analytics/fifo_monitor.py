@@ -0,0 +1,268 @@
+import itertools
+import json
+import logging
+import queue
+import socket
+import threading
+
+import pandas as pd
+from sortedcontainers import SortedList
+
+from .fifo_engine import FIFO_KEYS, SUMMARY_KEYS
+
+log = logging.getLogger(__name__)
+
+# A gate event is one JSON object per line:
+#   {"Container #": "TRLU6731648", "Move": "IN", "Date": "2024-05-01 08:30",
+#    "POL Agent": "...", "POL Port": "AEJEA", "Category": "DRY", "Size": "40'", "Type": "Hi-Cube"}
+#   {"Container #": "TRLU6731648", "Move": "OUT", "Date": "2024-05-09 14:10"}
+# OUT moves only need the container number and date; the group comes from the IN move.
+# Feeds hand over raw lines; the monitor parses each one on its own, so a bad
+# line is counted as rejected and never takes the rest of a read with it.
+
+
+class JsonlFeed:
+    """Reads gate event lines appended to a local JSONL file since the last read."""
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+
+    def read(self):
+        try:
+            with open(self.path, "rb") as fh:
+                fh.seek(self.offset)
+                chunk = fh.read()
+        except FileNotFoundError:
+            return []
+        # keep a half-written last line for the next read
+        end = chunk.rfind(b"\n") + 1
+        self.offset += end
+        return [line for line in chunk[:end].splitlines() if line.strip()]
+
+
+class SocketFeed:
+    """Accepts line-delimited JSON gate event lines on a TCP port in a background thread."""
+
+    def __init__(self, host="127.0.0.1", port=9099):
+        self._events = queue.Queue()
+        self._server = socket.create_server((host, port))
+        self.address = self._server.getsockname()
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._receive, args=(conn,), daemon=True).start()
+
+    def _receive(self, conn):
+        with conn, conn.makefile("rb") as stream:
+            for line in stream:
+                if line.strip():
+                    self._events.put(line.rstrip())
+
+    def read(self):
+        events = []
+        while True:
+            try:
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def close(self):
+        self._server.close()
+
+
+class _Group:
+    def __init__(self):
+        self.depot = SortedList()      # IN DATEs of boxes still in depot
+        self.released = SortedList()   # IN DATEs of released boxes
+        self.released_visits = {}      # visit id -> IN DATE
+        self.no = 0
+
+    def oldest_in_depot(self):
+        return self.depot[0] if self.depot else None
+
+    def count_no(self):
+        # released boxes younger than the oldest box still in depot
+        oldest = self.oldest_in_depot()
+        if oldest is None:
+            return 0
+        return len(self.released) - self.released.bisect_right(oldest)
+
+
+class FifoMonitor:
+    """Incremental FIFO state for a stream of gate-in / gate-out moves.
+
+    Keeps, per (POL Agent, POL Port, Category, Size, Type) group, the sorted
+    IN DATEs of boxes in depot and of released boxes, so each move costs
+    O(log n). Statuses follow ``fifo_engine.fifo_status``: a released box is
+    "No" while an older box of its group is still in depot.
+
+    State is kept per visit, like the rows of a MYT sheet: a box that comes
+    back is a new visit, an IN repeated with the same IN DATE replaces that
+    visit, and an OUT closes the box's most recent open visit.
+    """
+
+    def __init__(self, feeds=()):
+        self.feeds = list(feeds)
+        self.unmatched = 0
+        self.rejected = 0   # feed lines that were not valid gate events
+        self._visits = {}   # visit id -> [group key or None, summary key, IN DATE, OUT DATE, container]
+        self._by_box = {}   # container -> {IN DATE: visit id}
+        self._ids = itertools.count()
+        self._groups = {}
+        self._totals = {}   # (POL Port, POL Agent) -> [in depot, released, no]
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, df, feeds=()):
+        """Seed the monitor from a loaded MYT sheet (one row per visit)."""
+        monitor = cls(feeds)
+        cols = ["Container #", "IN DATE", "OUT DATE"] + FIFO_KEYS
+        for box, in_date, out_date, *keys in df[cols].itertuples(index=False, name=None):
+            box = None if pd.isna(box) else str(box).strip().upper()
+            visit = monitor._gate_in(box, pd.Timestamp(in_date), dict(zip(FIFO_KEYS, keys)))
+            if pd.notna(out_date):
+                monitor._release(visit, pd.Timestamp(out_date))
+        return monitor
+
+    # ---------- event handling ----------
+
+    def apply(self, event):
+        with self._lock:
+            self._apply(event)
+
+    def poll(self):
+        """Drain every feed and apply its events; returns the number applied."""
+        with self._lock:
+            applied = 0
+            for feed in self.feeds:
+                for line in feed.read():
+                    try:
+                        self._apply(json.loads(line))
+                    except (ValueError, KeyError, TypeError) as exc:
+                        self.rejected += 1
+                        log.warning("Rejected gate event %.200r: %s", line, exc)
+                        continue
+                    applied += 1
+            return applied
+
+    def _apply(self, event):
+        # everything is validated before any state changes
+        box = str(event["Container #"]).strip().upper()
+        date = pd.Timestamp(event["Date"])
+        if pd.isna(date):
+            raise ValueError(f"No gate date for {box}")
+        move = str(event["Move"]).strip().upper()
+        if move == "IN":
+            self._gate_in(box, date, event)
+        elif move == "OUT":
+            self._gate_out(box, date)
+        else:
+            raise ValueError(f"Unknown gate move {event['Move']!r} for {box}")
+
+    def _gate_in(self, box, in_date, attrs):
+        visits = self._by_box.setdefault(box, {}) if box is not None else {}
+        if in_date in visits:
+            self._forget(visits[in_date])
+        values = [attrs.get(k) for k in FIFO_KEYS]
+        # like fifo_status: no group (and never "No") without every key and an IN DATE
+        key = None if pd.isna(in_date) or any(pd.isna(v) for v in values) else tuple(values)
+        agent, port = attrs.get("POL Agent"), attrs.get("POL Port")
+        summary_key = (None if pd.isna(port) else port, None if pd.isna(agent) else agent)
+        visit = next(self._ids)
+        self._visits[visit] = [key, summary_key, in_date, None, box]
+        visits[in_date] = visit
+        self._totals.setdefault(summary_key, [0, 0, 0])[0] += 1
+        if key is not None:
+            group = self._groups.setdefault(key, _Group())
+            group.depot.add(in_date)
+            self._recount(group, summary_key)
+        return visit
+
+    def _gate_out(self, box, out_date):
+        open_visits = [(in_date, visit) for in_date, visit in self._by_box.get(box, {}).items()
+                       if self._visits[visit][3] is None]
+        if not open_visits:
+            self.unmatched += 1
+            return
+        self._release(max(open_visits, key=lambda v: v[0])[1], out_date)
+
+    def _release(self, visit, out_date):
+        state = self._visits[visit]
+        key, summary_key, in_date, _, _ = state
+        state[3] = out_date
+        totals = self._totals[summary_key]
+        totals[0] -= 1
+        totals[1] += 1
+        if key is not None:
+            group = self._groups[key]
+            group.depot.remove(in_date)
+            group.released.add(in_date)
+            group.released_visits[visit] = in_date
+            self._recount(group, summary_key)
+
+    def _forget(self, visit):
+        key, summary_key, in_date, out_date, box = self._visits.pop(visit)
+        del self._by_box[box][in_date]
+        totals = self._totals[summary_key]
+        totals[0 if out_date is None else 1] -= 1
+        if key is not None:
+            group = self._groups[key]
+            if out_date is None:
+                group.depot.remove(in_date)
+            else:
+                group.released.remove(in_date)
+                del group.released_visits[visit]
+            self._recount(group, summary_key)
+
+    def _recount(self, group, summary_key):
+        no = group.count_no()
+        self._totals[summary_key][2] += no - group.no
+        group.no = no
+
+    # ---------- queries ----------
+
+    def status(self, box):
+        """(FIFO Status, FIFO Break Reason) of a box's latest visit, or None if unknown."""
+        visits = self._by_box.get(str(box).strip().upper())
+        if not visits:
+            return None
+        key, _, in_date, out_date, _ = self._visits[visits[max(visits)]]
+        if out_date is None:
+            return "In Depot", "Still in depot"
+        oldest = self._groups[key].oldest_in_depot() if key is not None else None
+        if oldest is not None and oldest < in_date:
+            return "No", f"Older box still in depot (IN < {oldest.date()})"
+        return "Yes", "Released in FIFO order"
+
+    def summary(self):
+        """Agent-port summary in the same layout as ``fifo_engine.summarise_fifo``."""
+        with self._lock:
+            rows = [(port, agent, depot, no, released - no, released)
+                    for (port, agent), (depot, released, no) in self._totals.items()
+                    if depot or released]
+        summary = pd.DataFrame(rows, columns=SUMMARY_KEYS + ["In Depot", "No", "Yes", "Released"])
+        pct = (summary["Yes"] / summary["Released"].where(summary["Released"] > 0) * 100).round(2)
+        summary["FIFO %"] = pct.fillna(0)
+        return summary.sort_values(["POL Port", "FIFO %"], ascending=[True, False], ignore_index=True)
+
+    def exceptions(self):
+        """Released boxes currently breaking FIFO."""
+        rows = []
+        with self._lock:
+            for key, group in self._groups.items():
+                if not group.no:
+                    continue
+                oldest = group.oldest_in_depot()
+                for visit, in_date in group.released_visits.items():
+                    if oldest < in_date:
+                        _, _, _, out_date, box = self._visits[visit]
+                        rows.append((box, *key, in_date, out_date,
+                                     f"Older box still in depot (IN < {oldest.date()})"))
+        return pd.DataFrame(rows, columns=["Container #"] + FIFO_KEYS
+                            + ["IN DATE", "OUT DATE", "FIFO Break Reason"])
@@ -0,0 +1,153 @@
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+
+# DASH_TRACE=1 records wall time and row counts per stage, DASH_TRACE=memory also
+# allocation peaks (tracemalloc, noticeably slower); unset or 0 turns everything off
+TRACE_ENV = 'DASH_TRACE'
+TRACE_FILE_ENV = 'DASH_TRACE_FILE'
+TRACE_FILE = 'trace.jsonl'
+
+_mode = os.environ.get(TRACE_ENV, '').strip().lower()
+ENABLED = _mode not in ('', '0', 'off', 'false')
+MEMORY = _mode == 'memory'
+
+_local = threading.local()
+_file_lock = threading.Lock()
+
+
+def _rows(value):
+    # rows of a frame, or of the first frame of a tuple result; None when not a table
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    shape = getattr(value, 'shape', None)
+    return int(shape[0]) if shape else None
+
+
+def _write(record):
+    path = os.environ.get(TRACE_FILE_ENV, TRACE_FILE)
+    line = json.dumps(record, default=str)
+    with _file_lock, open(path, 'a') as fh:
+        fh.write(line + '\n')
+
+
+class _NullStage:
+    # what stage() hands out when tracing is off: no clock, no allocation tracking
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullStage()
+
+
+class Stage:
+    """One timed block; set ``rows`` inside it to record how many rows it produced."""
+
+    def __init__(self, name, kind=None, rows=None):
+        self.name, self.kind, self.rows = name, kind, rows
+        self.peak = 0
+
+    def __enter__(self):
+        stack = _local.__dict__.setdefault('stack', [])
+        self.parent = stack[-1] if stack else None
+        stack.append(self)
+        if MEMORY:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            current, peak = tracemalloc.get_traced_memory()
+            if self.parent is not None:
+                # the parent's peak so far, before this block resets the counter
+                self.parent.peak = max(self.parent.peak, peak)
+            tracemalloc.reset_peak()
+            self.start_bytes = current
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        _local.stack.pop()
+        record = {
+            'ts': time.time(), 'run': getattr(_local, 'run', None), 'app': getattr(_local, 'app', None),
+            'stage': self.name, 'kind': self.kind, 'seconds': round(seconds, 6), 'rows': self.rows,
+            'depth': len(_local.stack), 'thread': threading.current_thread().name,
+        }
+        if MEMORY:
+            current, peak = tracemalloc.get_traced_memory()
+            self.peak = max(self.peak, peak)
+            if self.parent is not None:
+                self.parent.peak = max(self.parent.peak, self.peak)
+            record['alloc_mb'] = round((self.peak - self.start_bytes) / 2 ** 20, 3)
+            record['net_mb'] = round((current - self.start_bytes) / 2 ** 20, 3)
+        if exc_type is not None:
+            record['error'] = exc_type.__name__
+        run_records = getattr(_local, 'records', None)
+        if run_records is not None:
+            # only script-run threads keep records for the panel; others (watchers) just write the file
+            run_records.append(record)
+        _write(record)
+        return False
+
+
+def stage(name, kind=None, rows=None):
+    """``with stage('pivot', 'aggregate') as s: ...; s.rows = len(result)``."""
+    return Stage(name, kind, rows) if ENABLED else _NULL
+
+
+def timed(name=None, kind=None):
+    """Decorator form of ``stage``; the row count is taken from the return value.
+
+    Put it under ``st.cache_*`` so only real (cache-miss) work is recorded.
+    With tracing off the function is returned unwrapped.
+    """
+    def decorate(func):
+        if not ENABLED:
+            return func
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with Stage(label, kind) as block:
+                result = func(*args, **kwargs)
+                block.rows = _rows(result)
+            return result
+        return wrapper
+    return decorate
+
+
+def start_run(app):
+    """Mark the start of one script run of ``app``; the panel shows this run's stages."""
+    if ENABLED:
+        _local.app, _local.run, _local.records = app, uuid.uuid4().hex[:8], []
+
+
+def records():
+    return list(getattr(_local, 'records', []))
+
+
+def panel():
+    """Sidebar expander with this run's stages, when tracing is on."""
+    if not ENABLED:
+        return
+    import pandas as pd
+    import streamlit as st
+
+    table = pd.DataFrame(records())
+    with st.sidebar.expander('⏱ Stage timings (debug)'):
+        if table.empty:
+            st.caption('Nothing recomputed on this run (all cached).')
+            return
+        columns = [c for c in ['stage', 'kind', 'seconds', 'rows', 'alloc_mb', 'net_mb'] if c in table.columns]
+        top = table[table['depth'] == 0]
+        st.caption(f"{top['seconds'].sum():.3f}s in {len(table)} stage(s) · trace file "
+                   f"{os.environ.get(TRACE_FILE_ENV, TRACE_FILE)}")
+        st.dataframe(table[columns], hide_index=True, use_container_width=True)
+        st.dataframe(top.groupby('kind', dropna=False)['seconds'].sum().round(3), use_container_width=True)
@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+
+DELAY = 'Delay (Days)'
+RATINGS = ['Excellent', 'Good', 'Average', 'Need Improvement', 'Missing']
+
+# Finest grouping every KPI table and chart rolls up from
+GRAIN = ['subordinate', 'Lead', 'Region', 'POL Port', 'Date']
+
+# Trend granularity -> pandas period frequency (weeks start on Monday, like WeekStart)
+TREND_PERIODS = {'Daily': 'D', 'Weekly': 'W-SUN', 'Monthly': 'M', 'Quarterly': 'Q'}
+
+# Sidebar multiselects backed by a bitmap index
+FILTER_COLUMNS = ['Region', 'Lead', 'subordinate', 'POL Port']
+
+
+def rate(delay) -> pd.Categorical:
+    """Vectorised rating: <=2 Excellent, <3 Good, <4 Average, otherwise Need Improvement."""
+    delay = np.asarray(delay, dtype=float)
+    codes = np.select([np.isnan(delay), delay <= 2, delay < 3, delay < 4], [4, 0, 1, 2], default=3)
+    return pd.Categorical.from_codes(codes, categories=RATINGS)
+
+
+def merge_mapping(activity_df: pd.DataFrame, map_df: pd.DataFrame) -> pd.DataFrame:
+    """Clean an activity upload, rate every delay and join the POL-Port mapping, ready for FilterIndex."""
+    activity_df.columns = activity_df.columns.str.strip()
+    map_df.columns = map_df.columns.str.strip()
+
+    activity_df["Activity Date"] = pd.to_datetime(activity_df["Activity Date"], errors="coerce")
+    activity_df["System Date"] = pd.to_datetime(activity_df["System Date"], errors="coerce")
+    activity_df[DELAY] = (activity_df["System Date"] - activity_df["Activity Date"]).dt.days
+
+    activity_df["Performance"] = rate(activity_df[DELAY])
+
+    merged = activity_df.merge(map_df, how="left", on="POL Port")
+    merged["Month"] = merged["Activity Date"].dt.to_period("M")
+    merged["Quarter"] = merged["Activity Date"].dt.to_period("Q")
+    merged["Week"] = merged["Activity Date"].dt.isocalendar().week
+    merged["WeekStart"] = merged["Activity Date"] - pd.to_timedelta(merged["Activity Date"].dt.weekday, unit="d")
+    merged["Week Range"] = merged["WeekStart"].dt.strftime('%d %b') + " - " + (merged["WeekStart"] + pd.Timedelta(days=6)).dt.strftime('%d %b')
+    return prepare(merged)
+
+
+def prepare(df: pd.DataFrame) -> pd.DataFrame:
+    """Grain columns as categoricals (done once per upload), so grouping only touches integer codes."""
+    df = df.assign(Date=df['Activity Date'].dt.normalize())
+    for col in GRAIN:
+        if col not in df.columns:
+            df[col] = np.nan
+        df[col] = df[col].astype('category')
+    return df
+
+
+class GroupingSets:
+    """Count and Delay sum for every KPI grouping level from one pass over the rows.
+
+    The rows are grouped once at the finest grain (GRAIN) with ``bincount``
+    over combined category codes, together with per-rating row counts. Each
+    table is then a roll-up of that small cube rather than another pass over
+    the activity data. ``rows`` (positions, e.g. from FilterIndex.select)
+    restricts the pass without materialising a filtered frame.
+    """
+
+    def __init__(self, df: pd.DataFrame, rows=None):
+        rows = slice(None) if rows is None else rows
+        # mixed-radix key over the codes (+1 so missing values get their own slot)
+        radix = [len(df[col].cat.categories) + 1 for col in GRAIN]
+        combined = 0
+        for col, base in zip(GRAIN, radix):
+            combined = combined * base + df[col].cat.codes.to_numpy(dtype=np.int64)[rows] + 1
+        group, keys = pd.factorize(np.asarray(combined, dtype=np.int64))
+        groups = len(keys)
+
+        delay = df[DELAY].to_numpy(dtype=float)[rows]
+        valid = ~np.isnan(delay)
+        cube = {}
+        for col, base in reversed(list(zip(GRAIN, radix))):
+            keys, code = np.divmod(keys, base)
+            cube[col] = pd.Categorical.from_codes(code - 1, dtype=df[col].dtype)
+        cube = {col: cube[col] for col in GRAIN}
+        cube['Rows'] = np.bincount(group, minlength=groups)
+        cube['Count'] = np.bincount(group, weights=valid, minlength=groups).astype(np.int64)
+        cube['Delay Sum'] = np.bincount(group, weights=np.where(valid, delay, 0), minlength=groups)
+        rating = rate(delay).codes
+        for code, name in enumerate(RATINGS):
+            cube[name] = np.bincount(group, weights=rating == code, minlength=groups).astype(np.int64)
+        self.cube = pd.DataFrame(cube)
+
+    @classmethod
+    def from_cube(cls, cube: pd.DataFrame):
+        """Wrap an existing GRAIN-level cube (e.g. a slice of the rollup store)."""
+        sets = cls.__new__(cls)
+        sets.cube = cube
+        return sets
+
+    def totals(self) -> pd.Series:
+        """Row count and per-rating counts over everything aggregated."""
+        return self.cube[['Rows'] + RATINGS].sum()
+
+    def level(self, keys, average='Avg_Delay') -> pd.DataFrame:
+        """Same table as ``groupby(keys).agg(count, mean).round(2)`` plus a Rating column."""
+        keys = [keys] if isinstance(keys, str) else list(keys)
+        sums = self.cube.groupby(keys, observed=True)[['Count', 'Delay Sum']].sum()
+        table = pd.DataFrame({
+            'Total_Activities': sums['Count'],
+            average: (sums['Delay Sum'] / sums['Count'].where(sums['Count'] > 0)).round(2),
+        }).reset_index()
+        table['Rating'] = np.asarray(rate(table[average]))
+        return table
+
+    def trend(self, period='Daily'):
+        """Average delay per day, week, month or quarter, rolled up from the daily cube."""
+        dates = self.cube['Date'].astype(self.cube['Date'].cat.categories.dtype)
+        starts = dates.dt.to_period(TREND_PERIODS[period]).dt.start_time
+        sets = GroupingSets.from_cube(self.cube.assign(Date=starts.astype('category')))
+        return sets.level('Date', average=DELAY)[['Date', DELAY]]
+
+
+class FilterIndex:
+    """Packed bitmaps per filter value over the rows sorted by Activity Date.
+
+    Built once per upload. A sidebar selection is then an OR of the chosen
+    values' bitmaps per column and an AND across columns, restricted to the
+    byte range that a binary search on the sorted dates gives for the date
+    range. Returns row positions for GroupingSets; no frame is copied.
+    """
+
+    def __init__(self, df: pd.DataFrame, columns=FILTER_COLUMNS, date='Activity Date'):
+        order = np.argsort(df[date].to_numpy(), kind='stable')  # NaT sorts last
+        self.df = df.iloc[order].reset_index(drop=True)
+        self.dates = self.df[date].to_numpy()
+        self.bitmaps = {}
+        for col in columns:
+            codes = self.df[col].cat.codes.to_numpy()
+            by_code = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[by_code], np.arange(len(self.df[col].cat.categories) + 1))
+            bitmaps = {}
+            for k, value in enumerate(self.df[col].cat.categories):
+                bits = np.zeros(len(codes), dtype=bool)
+                bits[by_code[bounds[k]:bounds[k + 1]]] = True
+                bitmaps[value] = np.packbits(bits)
+            self.bitmaps[col] = bitmaps
+
+    def options(self, col):
+        return list(self.bitmaps[col])
+
+    def select(self, filters, start=None, end=None):
+        """Positions of rows matching every ``{column: values}`` filter and ``start <= date <= end``."""
+        lo = 0 if start is None else np.searchsorted(self.dates, np.datetime64(start), side='left')
+        hi = len(self.dates) if end is None else np.searchsorted(self.dates, np.datetime64(end), side='right')
+        first, last = lo // 8, -(-hi // 8)
+        mask = None
+        for col, values in filters.items():
+            if not values:
+                continue
+            selected = np.zeros(last - first, dtype=np.uint8)
+            for value in values:
+                selected |= self.bitmaps[col][value][first:last]
+            mask = selected if mask is None else mask & selected
+        if mask is None:
+            return np.arange(lo, hi)
+        positions = np.flatnonzero(np.unpackbits(mask)) + first * 8
+        return positions[(positions >= lo) & (positions < hi)]
@@ -0,0 +1,99 @@
+import json
+import os
+import threading
+
+import pandas as pd
+
+from .kpi_engine import GRAIN, GroupingSets
+
+ROLLUP_DIR = '.rollups'
+
+
+def _days(cube):
+    return cube['Date'].astype(cube['Date'].cat.categories.dtype)
+
+
+def _plain(cube):
+    # categories differ between uploads; concatenate as plain values
+    return cube.astype({col: object for col in GRAIN})
+
+
+def _cells(cube):
+    # NaN keys match each other in MultiIndex.isin, so blank Leads etc. still line up
+    return pd.MultiIndex.from_frame(cube[GRAIN].assign(Date=pd.to_datetime(cube['Date'])))
+
+
+class RollupStore:
+    """Daily KPI partial aggregates kept on disk across sessions.
+
+    One row per (subordinate, Lead, Region, POL Port, day) with the row,
+    Delay count/sum and per-rating counts of a GroupingSets cube. An upload
+    is merged once (by content id) and is authoritative for the
+    (subordinate, Lead, Region, POL Port, day) cells it contains: those
+    cells are replaced, everything else is kept, so a regional upload never
+    touches another region's rows for the same days. Rows without
+    an Activity Date cannot fall in any range and are not stored. Weeks,
+    months and quarters roll up from the daily rows.
+    """
+
+    def __init__(self, directory=ROLLUP_DIR):
+        self.path = os.path.join(directory, 'kpi_daily.parquet')
+        self.sources_path = os.path.join(directory, 'sources.json')
+        self._lock = threading.Lock()
+        self.cube = self._categorise(pd.read_parquet(self.path)) if os.path.exists(self.path) else None
+        try:
+            with open(self.sources_path) as fh:
+                self.sources = json.load(fh)
+        except FileNotFoundError:
+            self.sources = []
+
+    @property
+    def empty(self):
+        return self.cube is None or self.cube.empty
+
+    @staticmethod
+    def _categorise(cube):
+        return cube.astype({col: 'category' for col in GRAIN})
+
+    def _write(self, path, write):
+        # readers in other sessions never see a half-written file
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        write(tmp)
+        os.replace(tmp, path)
+
+    def _write_sources(self, tmp):
+        with open(tmp, 'w') as fh:
+            json.dump(self.sources, fh)
+
+    def merge(self, source_id, cube: pd.DataFrame):
+        """Fold one upload's GRAIN cube into the store; False if it was merged before."""
+        with self._lock:
+            if source_id in self.sources:
+                return False
+            cube = _plain(cube[_days(cube).notna()])
+            if not self.empty:
+                replaced = _cells(_plain(self.cube)).isin(_cells(cube))
+                cube = pd.concat([_plain(self.cube[~replaced]), cube], ignore_index=True)
+            cube = cube.assign(Date=pd.to_datetime(cube['Date']))
+            self._write(self.path, lambda tmp: cube.to_parquet(tmp, index=False))
+            self.cube = self._categorise(cube)
+            self.sources.append(source_id)
+            self._write(self.sources_path, self._write_sources)
+            return True
+
+    def options(self, col):
+        return [] if self.empty else sorted(self.cube[col].dropna().unique())
+
+    def query(self, filters, start=None, end=None) -> GroupingSets:
+        """KPI aggregates for ``{column: values}`` filters and whole days ``start``..``end``."""
+        cube = self.cube
+        mask = pd.Series(True, index=cube.index)
+        for col, values in filters.items():
+            if values:
+                mask &= cube[col].isin(values)
+        if start is not None or end is not None:
+            days = _days(cube)
+            mask &= days.between(pd.Timestamp(start or days.min()).normalize(),
+                                 pd.Timestamp(end or days.max()).normalize())
+        return GroupingSets.from_cube(cube[mask])
@@ -0,0 +1,78 @@
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+# Port coordinates (lat, lon)
+PORT_COORDS = {
+    'NOVOROSSIYSK': (44.7239, 37.7695), 'MERSIN': (36.7990, 34.6400), 'BEIRUT': (33.9017, 35.4866),
+    'ALEXANDRIA (OLDPORT)': (31.2001, 29.9187), 'AMBARLI': (40.9541, 28.7335), 'GEBZE': (40.7976, 29.4304),
+    'ASHDOD': (31.8044, 34.6553), 'HAIFA': (32.7940, 34.9896), 'EL DEKHEILA': (31.1333, 29.8667),
+    'SANKO': (36.8, 34.6), 'DAMIETTA': (31.4167, 31.8167)
+}
+
+EARTH_RADIUS_NM = 3440.065
+# Typical feeder service speed used for the expected transit time
+SERVICE_SPEED_KN = 14.0
+# Average speeds above this are not physically possible for these vessels
+MAX_SPEED_KN = 30.0
+
+
+def haversine_nm(lat0, lon0, lat1, lon1):
+    """Great-circle distance in nautical miles; inputs in degrees, broadcast like NumPy."""
+    lat0, lon0, lat1, lon1 = (np.radians(np.asarray(v, dtype=float)) for v in (lat0, lon0, lat1, lon1))
+    a = np.sin((lat1 - lat0) / 2) ** 2 + np.cos(lat0) * np.cos(lat1) * np.sin((lon1 - lon0) / 2) ** 2
+    return 2 * EARTH_RADIUS_NM * np.arcsin(np.sqrt(a))
+
+
+class PortTable:
+    """Port names -> coordinate arrays, with a lazily built port-to-port distance matrix."""
+
+    def __init__(self, coords=PORT_COORDS):
+        self.ports = pd.Index(list(coords))
+        self.lat = np.array([c[0] for c in coords.values()], dtype=float)
+        self.lon = np.array([c[1] for c in coords.values()], dtype=float)
+
+    @cached_property
+    def distance_matrix(self) -> np.ndarray:
+        return haversine_nm(self.lat[:, None], self.lon[:, None], self.lat[None, :], self.lon[None, :])
+
+    def distances(self) -> pd.DataFrame:
+        return pd.DataFrame(self.distance_matrix, index=self.ports, columns=self.ports).round(0)
+
+
+def leg_metrics(legs: pd.DataFrame, ports: PortTable, service_speed=SERVICE_SPEED_KN, max_speed=MAX_SPEED_KN):
+    """Distance, average speed and expected vs actual transit for every leg, in one vectorised pass.
+
+    Adds "Distance (nm)", "Transit Days", "Speed (kn)", "Expected Days" (at
+    ``service_speed``) and "Excess Days", plus an "Issue" column naming
+    legs that cannot be right: unknown port, arrival not after departure
+    for a real passage, or an average speed above ``max_speed``.
+    """
+    origin = ports.ports.get_indexer(legs['Port of loading'])
+    dest = ports.ports.get_indexer(legs['Unloading port'])
+    known = (origin >= 0) & (dest >= 0)
+    distance = np.where(known, ports.distance_matrix[origin, dest], np.nan)
+
+    days = ((legs['Arrival'] - legs['Departure']) / pd.Timedelta(days=1)).to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        speed = np.where(days > 0, distance / (days * 24), np.nan)
+    expected = distance / service_speed / 24
+
+    issue = np.select(
+        [~known, (days <= 0) & (distance > 0), speed > max_speed],
+        ['Unknown port', 'Arrival not after departure', 'Impossible speed'], default='')
+    return legs.assign(**{
+        'Distance (nm)': distance.round(0), 'Transit Days': days, 'Speed (kn)': speed.round(1),
+        'Expected Days': expected.round(1), 'Excess Days': (days - expected).round(1),
+        'Issue': pd.Series(issue, index=legs.index).replace('', np.nan),
+    })
+
+
+def vessel_summary(metrics: pd.DataFrame) -> pd.DataFrame:
+    """Per-vessel legs, distance, mean speed/excess and flagged legs of a leg_metrics() frame."""
+    return metrics.groupby('Vessel').agg(**{
+        'Legs': ('Distance (nm)', 'size'), 'Distance (nm)': ('Distance (nm)', 'sum'),
+        'Mean Speed (kn)': ('Speed (kn)', 'mean'), 'Mean Excess Days': ('Excess Days', 'mean'),
+        'Flagged Legs': ('Issue', 'count'),
+    }).round(1)
@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+
+# Container type groups offered on the release page; no group means every type
+CONTAINER_TYPES = {
+    'SPECIAL': ['Flat Rack', 'Open Top', 'Reefer', 'Standard'],
+    'DRY': ['Heavy Duty', 'Hi-Cube']
+}
+
+BATCH_COLUMNS = ['Booking', 'POL Port', 'Size', 'Container Type', 'Quantity']
+
+
+class AgentPool:
+    """Empty containers for one (POL Port, Size, type group), pre-sorted for allocation.
+
+    Rows are sorted once by agent and by Ageing Days (oldest first) inside each
+    agent, with a prefix sum of the ageing. The top-q average of any agent is
+    then two lookups, and the oldest boxes across all agents a slice of a
+    second, global ordering.
+    """
+
+    def __init__(self, candidates: pd.DataFrame):
+        usable = candidates['POL Agent'].notna() & candidates['Container #'].notna()
+        # positions of the pool rows in the allocator's frame (shared by reservations)
+        self.rows = candidates.index[usable].to_numpy()
+        self.candidates = candidates[usable].reset_index(drop=True)
+        # missing Ageing Days rank as the youngest boxes
+        ages = self.candidates['Ageing Days'].fillna(0).to_numpy(dtype=float)
+        codes, self.agents = pd.factorize(self.candidates['POL Agent'], sort=True)
+
+        self.by_agent = np.lexsort((-ages, codes))
+        self.counts = np.bincount(codes, minlength=len(self.agents))
+        self.starts = np.cumsum(self.counts) - self.counts
+        self.prefix = np.concatenate([[0.0], np.cumsum(ages[self.by_agent])])
+        self.oldest_first = np.argsort(-ages, kind='stable')
+
+    @property
+    def total(self):
+        return len(self.candidates)
+
+    def agent_summary(self):
+        """Available containers and average ageing per agent."""
+        sums = self.prefix[self.starts + self.counts] - self.prefix[self.starts]
+        return pd.DataFrame({
+            'POL Agent': self.agents,
+            'Available Containers': self.counts,
+            'Average Aging': sums / np.maximum(self.counts, 1),
+        })
+
+    def best_single_agent(self, quantity):
+        """Agent whose ``quantity`` oldest boxes have the highest average ageing, or None."""
+        eligible = np.flatnonzero(self.counts >= quantity)
+        if not len(eligible):
+            return None
+        starts = self.starts[eligible]
+        top_avg = (self.prefix[starts + quantity] - self.prefix[starts]) / quantity
+        return self.agents[eligible[np.argmax(top_avg)]]
+
+    def release(self, quantity):
+        """``(agent, rows)`` for a release of ``quantity`` boxes, as the release page decides it.
+
+        One agent's oldest boxes when an agent can cover the whole request,
+        else the oldest boxes across agents (``agent`` None), else
+        ``(None, None)`` when the pool is too small.
+        """
+        agent = self.best_single_agent(quantity)
+        if agent is not None:
+            return agent, self.single_agent_release(agent, quantity)
+        if self.total >= quantity:
+            return None, self.oldest_across_agents(quantity)
+        return None, None
+
+    def single_agent_release(self, agent, quantity):
+        i = self.agents.get_loc(agent)
+        start = self.starts[i]
+        return self.candidates.iloc[self.by_agent[start:start + quantity]]
+
+    def oldest_across_agents(self, quantity):
+        """The ``quantity`` oldest boxes in the pool, whichever agent holds them."""
+        return self.candidates.iloc[self.oldest_first[:quantity]]
+
+
+class ReleaseAllocator:
+    """Builds and keeps one AgentPool per (POL Port, Size, types) request shape."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.empty = df[df['Activity Mode'] == 'Empty'].reset_index(drop=True)
+        self._pools = {}
+
+    def pool(self, port, size, types=None):
+        key = (port, size, tuple(types) if types else None)
+        if key not in self._pools:
+            mask = (self.empty['POL Port'] == port) & (self.empty['Size'] == size)
+            if types:
+                mask &= self.empty['Type'].isin(types)
+            self._pools[key] = AgentPool(self.empty[mask])
+        return self._pools[key]
+
+    def plan_batch(self, requests: pd.DataFrame):
+        """Allocate a whole list of booking requests in one pass.
+
+        Each pool's oldest-first ordering works as a priority queue with a
+        cursor; a shared reservation mask means a box taken by one booking is
+        skipped by every later one, including bookings on overlapping type
+        groups. Requests are served in file order and may be part-filled.
+        Returns ``(allocations, summary)``: one row per released box, and one
+        row per booking with Allocated and Shortfall counts.
+        """
+        requests = requests.rename(columns=str.strip)
+        missing = [c for c in BATCH_COLUMNS if c not in requests.columns]
+        if missing:
+            raise ValueError(f"Batch file is missing column(s): {', '.join(missing)}")
+
+        reserved = np.zeros(len(self.empty), dtype=bool)
+        cursors = {}
+        picked_rows, picked_booking, allocated = [], [], []
+        for booking, port, size, group, quantity in requests[BATCH_COLUMNS].itertuples(index=False):
+            group = '' if pd.isna(group) else str(group).strip().upper()
+            if group and group not in CONTAINER_TYPES:
+                raise ValueError(f"Unknown Container Type {group!r} for booking {booking}")
+            types = CONTAINER_TYPES.get(group)
+            quantity = int(quantity)
+            pool = self.pool(port, size, types)
+            key = (port, size, group)
+            queue = cursors.get(key)
+            if queue is None:
+                queue = cursors[key] = [pool.rows[pool.oldest_first], 0]
+            order, pos = queue
+
+            take = []
+            while pos < len(order) and len(take) < quantity:
+                row = order[pos]
+                pos += 1
+                if not reserved[row]:
+                    take.append(row)
+            queue[1] = pos
+            reserved[take] = True
+
+            picked_rows.extend(take)
+            picked_booking.extend([booking] * len(take))
+            allocated.append(len(take))
+
+        allocations = self.empty.iloc[picked_rows].drop(columns='Booking', errors='ignore').reset_index(drop=True)
+        allocations.insert(0, 'Booking', picked_booking)
+        summary = requests[BATCH_COLUMNS].copy()
+        summary['Allocated'] = allocated
+        summary['Shortfall'] = summary['Quantity'] - summary['Allocated']
+        return allocations, summary
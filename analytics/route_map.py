@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+# Line widths for the traffic quartiles of the drawn edges (busiest last)
+TRAFFIC_WIDTHS = [1.5, 3, 5, 8]
+
+
+def route_edges(legs: pd.DataFrame) -> pd.DataFrame:
+    """One row per (Port of loading, Unloading port) with leg/vessel counts and the date span."""
+    return (legs.groupby(['Port of loading', 'Unloading port'], observed=True)
+                .agg(Legs=('Vessel', 'size'), Vessels=('Vessel', 'nunique'),
+                     First=('Departure', 'min'), Last=('Arrival', 'max'))
+                .reset_index())
+
+
+def _segments(lat0, lon0, lat1, lon1):
+    # origin, destination, gap - one trace draws many separate lines
+    gap = np.full(len(lat0), np.nan)
+    return np.column_stack([lat0, lat1, gap]).ravel(), np.column_stack([lon0, lon1, gap]).ravel()
+
+
+def route_map(edges: pd.DataFrame, port_coords):
+    """Route map whose size depends on the number of unique edges, not legs.
+
+    Edges are drawn as NaN-separated lines, one trace per traffic width;
+    hover details sit on a single marker trace at the edge midpoints,
+    coloured by leg count. Edges with a port missing from ``port_coords``
+    are not drawn.
+    """
+    import plotly.graph_objects as go
+
+    coords = pd.DataFrame.from_dict(port_coords, orient='index', columns=['lat', 'lon'])
+    edges = (edges.join(coords, on='Port of loading')
+                  .join(coords, on='Unloading port', rsuffix='_to')
+                  .dropna(subset=['lat', 'lat_to']))
+
+    fig = go.Figure()
+    if len(edges):
+        tiers = pd.qcut(edges['Legs'].rank(method='first'), min(len(TRAFFIC_WIDTHS), len(edges)), labels=False)
+        for tier, group in edges.groupby(tiers):
+            lat, lon = _segments(group['lat'], group['lon'], group['lat_to'], group['lon_to'])
+            fig.add_trace(go.Scattermap(lat=lat, lon=lon, mode='lines', hoverinfo='skip',
+                                        line=dict(width=TRAFFIC_WIDTHS[int(tier)], color='steelblue')))
+        hover = (edges['Port of loading'] + ' → ' + edges['Unloading port']
+                 + '<br>' + edges['Legs'].astype(str) + ' legs, ' + edges['Vessels'].astype(str) + ' vessel(s)'
+                 + '<br>' + edges['First'].dt.strftime('%Y-%m-%d') + ' to ' + edges['Last'].dt.strftime('%Y-%m-%d'))
+        fig.add_trace(go.Scattermap(
+            lat=(edges['lat'] + edges['lat_to']) / 2, lon=(edges['lon'] + edges['lon_to']) / 2,
+            mode='markers', hoverinfo='text', text=hover,
+            marker=dict(size=7, color=edges['Legs'], colorscale='Blues', showscale=True,
+                        colorbar=dict(title='Legs'))))
+    fig.add_trace(go.Scattermap(lat=coords['lat'], lon=coords['lon'], mode='markers+text',
+                                marker=dict(size=8, color='red'), text=coords.index, textposition='top center'))
+    fig.update_layout(showlegend=False)
+    return fig
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from .chart_render import render_mode
+
+# Fixed seed: the same edge set always gets the same picture
+LAYOUT_SEED = 42
+
+
+def edge_key(edges: pd.DataFrame):
+    """Hashable, order-independent key of a route_edges() frame (ports + leg counts)."""
+    return tuple(sorted(edges[['Port of loading', 'Unloading port', 'Legs']].itertuples(index=False, name=None)))
+
+
+class RouteNetwork:
+    """Port graph, seeded layout and port importance metrics for one edge set.
+
+    Build it once per ``edge_key`` (it is pure in its input), then reuse it
+    across reruns; Degree counts distinct connected ports, Legs the traffic
+    through a port, and Betweenness/Closeness treat each route as one hop.
+    """
+
+    def __init__(self, key):
+        import networkx as nx
+
+        self.graph = nx.DiGraph()
+        self.graph.add_weighted_edges_from(key, weight='legs')
+        self.layout = nx.spring_layout(self.graph, seed=LAYOUT_SEED) if len(self.graph) else {}
+
+        graph = self.graph
+        ports = list(graph.nodes)
+        self.metrics = pd.DataFrame({
+            'Port': ports,
+            'Degree': [graph.degree(p) for p in ports],
+            'Legs': [graph.degree(p, weight='legs') for p in ports],
+            'Degree Centrality': pd.Series(nx.degree_centrality(graph)).reindex(ports).to_numpy(),
+            'Closeness': pd.Series(nx.closeness_centrality(graph)).reindex(ports).to_numpy(),
+            'Betweenness': pd.Series(nx.betweenness_centrality(graph)).reindex(ports).to_numpy(),
+        }).sort_values(['Betweenness', 'Degree', 'Legs'], ascending=False, ignore_index=True).round(3)
+
+    def figure(self):
+        """All edges in one NaN-separated line trace (WebGL when long), all ports in one marker trace."""
+        import plotly.graph_objects as go
+
+        pos = self.layout
+        fig = go.Figure()
+        if not pos:
+            return fig
+        edges = list(self.graph.edges)
+        x = np.array([[pos[a][0], pos[b][0], np.nan] for a, b in edges]).ravel()
+        y = np.array([[pos[a][1], pos[b][1], np.nan] for a, b in edges]).ravel()
+        lines = go.Scattergl if render_mode(len(x)) == 'webgl' else go.Scatter
+        fig.add_trace(lines(x=x, y=y, mode='lines', line=dict(width=1, color='gray'), hoverinfo='skip'))
+
+        nodes = self.metrics.set_index('Port').loc[list(pos)]
+        hover = [f"{port}<br>Degree {m['Degree']}, {m['Legs']} legs<br>Betweenness {m['Betweenness']}"
+                 for port, m in nodes.iterrows()]
+        fig.add_trace(go.Scatter(
+            x=[p[0] for p in pos.values()], y=[p[1] for p in pos.values()], mode='markers+text',
+            text=list(pos), textposition='top center', hovertext=hover, hoverinfo='text',
+            marker=dict(size=8 + 4 * np.sqrt(nodes['Degree'].to_numpy()), color=nodes['Betweenness'],
+                        colorscale='Viridis', showscale=True, colorbar=dict(title='Betweenness'))))
+        return fig
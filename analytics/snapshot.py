@@ -0,0 +1,125 @@
+import glob
+import hashlib
+import json
+import os
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from .delta_store import DeltaStore
+
+# Low-cardinality columns stored dictionary-encoded (pandas category <-> Arrow dictionary)
+DICTIONARY_COLUMNS = [
+    'Company', 'Region Name', 'POL Port', 'POL Agent', 'POFD Port', 'POFD Agent',
+    'Size', 'Type', 'Activity', 'Activity Mode',
+]
+
+SNAPSHOT_DIR = '.snapshots'
+# Delta store published by update_data.py, next to the workbook it replaces
+STORE_SUFFIX = '.store'
+_HASH_CHUNK = 1 << 20
+
+
+def _snapshot_dir(path):
+    return os.path.join(os.path.dirname(os.path.abspath(path)), SNAPSHOT_DIR)
+
+
+def content_hash(path):
+    """SHA-256 of the workbook bytes, memoised on (size, mtime) in the snapshot dir."""
+    st = os.stat(path)
+    index_path = os.path.join(_snapshot_dir(path), 'index.json')
+    try:
+        with open(index_path) as fh:
+            index = json.load(fh)
+    except (FileNotFoundError, ValueError):
+        index = {}
+    name = os.path.basename(path)
+    known = index.get(name)
+    if known and known['size'] == st.st_size and known['mtime_ns'] == st.st_mtime_ns:
+        return known['sha256']
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(_HASH_CHUNK), b''):
+            digest.update(block)
+    index[name] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': digest.hexdigest()}
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+    _atomic_write(index_path, lambda tmp: _write_json(tmp, index))
+    return index[name]['sha256']
+
+
+def _write_json(path, obj):
+    with open(path, 'w') as fh:
+        json.dump(obj, fh)
+
+
+def _atomic_write(path, write):
+    # readers in other apps never see a half-written file
+    tmp = f'{path}.{os.getpid()}.tmp'
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _to_arrow_friendly(df):
+    df.columns = df.columns.astype(str).str.strip()
+    for col in df.columns:
+        if df[col].dtype == object and pd.api.types.infer_dtype(df[col], skipna=True).startswith('mixed'):
+            # Excel columns mixing numbers and text (e.g. booking refs, Size 20 / "40'") -> text
+            df[col] = df[col].map(lambda v: v if pd.isna(v) else str(v))
+        if col in DICTIONARY_COLUMNS:
+            # after the text pass: Arrow dictionaries need one value type
+            df[col] = df[col].astype('category')
+    return df
+
+
+def read_workbook(path, sheet_name=0):
+    """Parse one sheet straight from Excel, with the snapshot's column types."""
+    return _to_arrow_friendly(pd.read_excel(path, sheet_name=sheet_name))
+
+
+def store_dir(path):
+    return os.path.splitext(os.path.abspath(path))[0] + STORE_SUFFIX
+
+
+def _store_for(path, sheet_name):
+    store = DeltaStore(store_dir(path))
+    if DeltaStore.exists(store.root) and sheet_name in (0, store.manifest()['sheet']):
+        return store
+    return None
+
+
+def snapshot_path(path, sheet_name=0):
+    """Build (if needed) and return the Parquet snapshot for ``path``/``sheet_name``.
+
+    When update_data.py has published a delta store for the workbook, the
+    snapshot is materialised from the store once per store version instead.
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    key = f'{stem}-{sheet_name}'
+    store = _store_for(path, sheet_name)
+    version = f'store{store.version:06d}' if store else content_hash(path)[:16]
+    target = os.path.join(_snapshot_dir(path), f'{key}-{version}.parquet')
+    if os.path.exists(target):
+        return target
+
+    df = _to_arrow_friendly(store.read()) if store else read_workbook(path, sheet_name)
+    _atomic_write(target, lambda tmp: df.to_parquet(tmp, index=False))
+    # older snapshots of the same workbook/sheet are never read again
+    for old in glob.glob(os.path.join(_snapshot_dir(path), f'{glob.escape(key)}-*.parquet')):
+        if old != target:
+            os.remove(old)
+    return target
+
+
+def load_activity(path='ContainerActivity.xlsx', sheet_name=0, columns=None):
+    """Load a ContainerActivity workbook through its content-addressed snapshot.
+
+    The first call after the workbook changes parses it once and writes the
+    snapshot; every later call only reads the requested ``columns`` from it.
+    """
+    return pd.read_parquet(snapshot_path(path, sheet_name), columns=columns)
+
+
+def available_columns(path='ContainerActivity.xlsx', sheet_name=0):
+    """Column names in the snapshot, read from the Parquet schema only."""
+    return pq.read_schema(snapshot_path(path, sheet_name)).names
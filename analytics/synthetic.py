@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+
+from .leg_metrics import PORT_COORDS, haversine_nm
+
+# Benchmark volumes (rows); every generator is seeded, so a size + seed is always the same frame
+SIZES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000, '10m': 10_000_000}
+
+START = pd.Timestamp('2024-01-01')
+
+PORTS = {
+    'AEJEA': 'MIDDLE EAST', 'OMSOH': 'MIDDLE EAST', 'IQUQR': 'MIDDLE EAST', 'BHBAH': 'MIDDLE EAST',
+    'QAHMD': 'MIDDLE EAST', 'KWSWK': 'MIDDLE EAST', 'INNSA': 'INDIA', 'INMUN': 'INDIA',
+    'PKKHI': 'INDIA', 'CNSHA': 'FAR EAST', 'SGSIN': 'FAR EAST', 'MYPKG': 'FAR EAST',
+}
+COMPANIES = ['ACME Lines', 'Blue Sea', 'Gulf Co']
+AGENTS = [f'Agent {i}' for i in range(12)]
+SIZES_FT = ["20'", "40'", "45'"]
+TYPES = ['Heavy Duty', 'Hi-Cube', 'Flat Rack', 'Open Top', 'Reefer', 'Standard']
+# Activity -> Activity Mode
+ACTIVITIES = {
+    'GATE IN EMPTY': 'Empty', 'RELEASE EMPTY': 'Empty', 'LOAD EMPTY': 'On The Way',
+    'DISCHARGE FULL': 'Full', 'SENT TO CONSIGNEE': 'Full',
+    'SENT TO SHIPPER': 'Full', 'RECEIVE FROM SHIPPER': 'Full', 'LOAD FULL': 'On The Way',
+}
+PREFIXES = ['TRLU', 'CCLU', 'MSKU', 'TGHU', 'BMOU']
+
+
+def _categorical(rng, values, n, p=None):
+    return pd.Categorical.from_codes(rng.choice(len(values), n, p=p), categories=values)
+
+
+def _container_numbers(rng, n, boxes):
+    # ``boxes`` distinct numbers, so one box has several activity rows
+    box = rng.integers(0, boxes, n)
+    return (pd.Series(np.asarray(PREFIXES)[box % len(PREFIXES)])
+            + pd.Series(box // len(PREFIXES)).astype(str).str.zfill(7)).to_numpy()
+
+
+def container_activity(n, seed=0) -> pd.DataFrame:
+    """ContainerActivity sheet as app.py, mty.py and fiforeport.py load it (snapshot dtypes)."""
+    rng = np.random.default_rng(seed)
+    ports = list(PORTS)
+    pol, pofd = rng.integers(0, len(ports), n), rng.integers(0, len(ports), n)
+    activity = rng.integers(0, len(ACTIVITIES), n)
+    modes = list(dict.fromkeys(ACTIVITIES.values()))
+    return pd.DataFrame({
+        'Company': _categorical(rng, COMPANIES, n),
+        'Container #': _container_numbers(rng, n, max(n // 4, 1)),
+        'Region Name': pd.Categorical(np.asarray(list(PORTS.values()))[pol]),
+        'POL Port': pd.Categorical.from_codes(pol, categories=ports),
+        'POL Agent': _categorical(rng, AGENTS, n),
+        'POFD Port': pd.Categorical.from_codes(pofd, categories=ports),
+        'POFD Agent': _categorical(rng, AGENTS, n),
+        'Size': _categorical(rng, SIZES_FT, n, p=[0.45, 0.45, 0.1]),
+        'Type': _categorical(rng, TYPES, n, p=[0.3, 0.3, 0.1, 0.1, 0.1, 0.1]),
+        'Activity': pd.Categorical.from_codes(activity, categories=list(ACTIVITIES)),
+        'Activity Mode': pd.Categorical(np.asarray(list(ACTIVITIES.values()))[activity], categories=modes),
+        'Activity Date': START + pd.to_timedelta(rng.integers(0, 365 * 24, n), unit='h'),
+        'Ageing Days': rng.integers(0, 200, n),
+    })
+
+
+def myt_dry(n, seed=0) -> pd.DataFrame:
+    """MYT workbook "DRY" sheet (fifo_engine.FIFO_COLUMNS), ~40% of boxes still in depot."""
+    rng = np.random.default_rng(seed)
+    in_date = START + pd.to_timedelta(rng.integers(0, 300 * 24, n), unit='h')
+    out_date = pd.Series(in_date + pd.to_timedelta(rng.integers(1, 60 * 24, n), unit='h'))
+    df = pd.DataFrame({
+        'Container #': _container_numbers(rng, n, n),
+        'POL Agent': _categorical(rng, AGENTS[:6], n),
+        'POL Port': _categorical(rng, list(PORTS)[:6], n),
+        'Category': _categorical(rng, ['DRY', 'SPECIAL'], n, p=[0.8, 0.2]),
+        'Size': _categorical(rng, SIZES_FT[:2], n),
+        'Type': _categorical(rng, TYPES[:2], n),
+        'IN DATE': in_date,
+        'OUT DATE': out_date.where(rng.random(n) > 0.4),
+    })
+    # a few unassigned boxes, as in the real sheet
+    df.loc[rng.random(n) < 0.01, 'POL Agent'] = np.nan
+    return df
+
+
+def kpi_activity(n, seed=0, ports=60):
+    """``(activity, mapping)`` uploads for "inventory kpi.py"; some ports are unmapped, some dates missing."""
+    rng = np.random.default_rng(seed)
+    names = [f'P{i:03d}' for i in range(ports)]
+    activity_date = START + pd.to_timedelta(rng.integers(0, 365 * 24, n), unit='h')
+    system_date = pd.Series(activity_date + pd.to_timedelta(rng.exponential(2.5, n) * 24, unit='h')).dt.round('min')
+    activity = pd.DataFrame({
+        'Container #': _container_numbers(rng, n, max(n // 4, 1)),
+        'Activity Date': activity_date,
+        'System Date': system_date.where(rng.random(n) > 0.02),
+        'POL Port': rng.choice(names, n),
+    })
+    mapped = ports - 3
+    mapping = pd.DataFrame({
+        'POL Port': names[:mapped],
+        'Region': rng.choice(['MIDDLE EAST', 'INDIA', 'FAR EAST'], mapped),
+        'Lead': rng.choice([f'Lead {i}' for i in range(4)], mapped),
+        'subordinate': rng.choice([f'Staff {i}' for i in range(12)], mapped),
+    })
+    return activity, mapping
+
+
+def vessel_legs(n, seed=0, legs_per_vessel=200, rotation=5, home='NOVOROSSIYSK') -> pd.DataFrame:
+    """Vessel schedule (voyages.VOYAGE_COLUMNS): each vessel loops a fixed rotation through ``home``."""
+    rng = np.random.default_rng(seed)
+    ports = pd.Index(list(PORT_COORDS))
+    lat = np.array([c[0] for c in PORT_COORDS.values()])
+    lon = np.array([c[1] for c in PORT_COORDS.values()])
+    vessels = max(-(-n // legs_per_vessel), 1)
+
+    # per-vessel rotation: home first, then ``rotation - 1`` other ports in random order
+    others = np.argsort(rng.random((vessels, len(ports))), axis=1)
+    others = others[others != ports.get_loc(home)].reshape(vessels, -1)[:, :rotation - 1]
+    rotations = np.column_stack([np.full(vessels, ports.get_loc(home)), others])
+
+    vessel = np.arange(n) // legs_per_vessel
+    leg = np.arange(n) % legs_per_vessel
+    origin = rotations[vessel, leg % rotation]
+    dest = rotations[vessel, (leg + 1) % rotation]
+
+    sail_days = haversine_nm(lat[origin], lon[origin], lat[dest], lon[dest]) / rng.uniform(11, 16, n) / 24
+    dwell_days = rng.uniform(0.5, 3, n)
+    elapsed = np.cumsum(sail_days + dwell_days)
+    first = np.searchsorted(vessel, vessel, side='left')
+    # restart the clock at each vessel's first leg
+    elapsed = elapsed - np.concatenate([[0.0], elapsed])[first]
+    departure = START + pd.to_timedelta(elapsed - sail_days, unit='D') + pd.to_timedelta(
+        rng.uniform(0, 30, vessels)[vessel], unit='D')
+    return pd.DataFrame({
+        'Vessel': pd.Index([f'VESSEL {i:04d}' for i in range(vessels)])[vessel],
+        'Port of loading': ports[origin],
+        'Unloading port': ports[dest],
+        'Departure': departure.round('h'),
+        'Arrival': (departure + pd.to_timedelta(sail_days, unit='D')).round('h'),
+    })
+
+
+SCHEMAS = {
+    'activity': container_activity,
+    'myt_dry': myt_dry,
+    'kpi': kpi_activity,
+    'voyages': vessel_legs,
+}
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from .container_index import ContainerIndex, normalise
+
+DATE_COLUMN = 'Activity Date'
+TIMELINE_COLUMNS = [
+    'Container #', DATE_COLUMN, 'Activity', 'Activity Mode', 'Company',
+    'POL Port', 'POL Agent', 'POFD Port', 'POFD Agent', 'Size', 'Type',
+]
+
+
+class ActivityTimeline(ContainerIndex):
+    """Every container's activity history, sorted by (Container #, Activity Date) once.
+
+    Each container owns one contiguous [start, end) range of the sorted
+    order, so a full journey is one binary search and a slice, and the last
+    known state of any batch of containers is the row at ``end - 1``.
+    Without an Activity Date column, file order stands in for time. Dates
+    are parsed first (text dates included); rows without one sort before
+    the dated rows of their container, so they are never the last state.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        df = df[[c for c in TIMELINE_COLUMNS if c in df.columns]]
+        if DATE_COLUMN in df.columns:
+            df = df.assign(**{DATE_COLUMN: pd.to_datetime(df[DATE_COLUMN], errors='coerce')})
+        super().__init__(df, then_by=DATE_COLUMN if DATE_COLUMN in df.columns else None)
+
+    def journey(self, container):
+        key = normalise([container]).iloc[0]
+        i = np.searchsorted(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            return self.df.iloc[[]]
+        return self.df.iloc[self.order[self.starts[i]:self.ends[i]]]
+
+    def last_state(self, containers):
+        """Latest activity row for each of ``containers`` that has any history."""
+        queries = normalise(containers).drop_duplicates().to_numpy(dtype=str)
+        groups = self._hash.get_indexer(queries)
+        groups = groups[groups >= 0]
+        return self.df.iloc[self.order[self.ends[groups] - 1]]
@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+
+VOYAGE_COLUMNS = ['Vessel', 'Port of loading', 'Unloading port', 'Departure', 'Arrival']
+DAY = pd.Timedelta(days=1)
+
+
+def read_voyages(path, sheet_name=0) -> pd.DataFrame:
+    """Vessel schedule rows with parsed dates; rows missing any voyage column dropped."""
+    df = pd.read_excel(path, sheet_name=sheet_name)
+    df = df[VOYAGE_COLUMNS].dropna()
+    df['Departure'] = pd.to_datetime(df['Departure'], errors='coerce')
+    df['Arrival'] = pd.to_datetime(df['Arrival'], errors='coerce')
+    return df
+
+
+class VoyageTable:
+    """All legs sorted by (Vessel, Departure) once, with per-vessel row offsets.
+
+    Adds "Leg Days" (arrival - departure) and "Dwell Days": time from
+    arriving at the unloading port until the vessel's next departure from
+    that same port. A vessel's legs are the rows ``starts[i]:ends[i]``, so a
+    sidebar selection slices the table instead of rescanning it.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        legs = df.sort_values(['Vessel', 'Departure', 'Arrival'], kind='stable').reset_index(drop=True)
+        legs['Leg Days'] = (legs['Arrival'] - legs['Departure']) / DAY
+
+        departures = (legs[['Vessel', 'Port of loading', 'Departure']].dropna()
+                      .drop_duplicates().sort_values('Departure'))
+        arrivals = legs[['Vessel', 'Unloading port', 'Arrival']].reset_index().dropna().sort_values('Arrival')
+        next_departure = pd.merge_asof(
+            arrivals, departures, left_on='Arrival', right_on='Departure',
+            left_by=['Vessel', 'Unloading port'], right_by=['Vessel', 'Port of loading'],
+            direction='forward').set_index('index')['Departure']
+        legs['Dwell Days'] = (next_departure.reindex(legs.index) - legs['Arrival']) / DAY
+        self.legs = legs
+
+        self.vessels = pd.Index(legs['Vessel'].unique())
+        vessel_rows = legs['Vessel'].to_numpy()
+        self.starts = np.searchsorted(vessel_rows, self.vessels.to_numpy(), side='left')
+        self.ends = np.searchsorted(vessel_rows, self.vessels.to_numpy(), side='right')
+
+    def vessel(self, name) -> pd.DataFrame:
+        i = self.vessels.get_loc(name)
+        return self.legs.iloc[self.starts[i]:self.ends[i]]
+
+    def select(self, vessels, start=None, end=None) -> pd.DataFrame:
+        """Legs of ``vessels`` departing on/after ``start`` and arriving on/before ``end``."""
+        groups = self.vessels.get_indexer(list(vessels))
+        groups = np.sort(groups[groups >= 0])
+        rows = np.concatenate([np.arange(self.starts[g], self.ends[g]) for g in groups]) if len(groups) else []
+        legs = self.legs.iloc[rows]
+        if start is not None:
+            legs = legs[legs['Departure'] >= pd.Timestamp(start)]
+        if end is not None:
+            legs = legs[legs['Arrival'] <= pd.Timestamp(end)]
+        return legs
+
+
+def port_calls(legs: pd.DataFrame) -> pd.DataFrame:
+    """Each vessel's distinct departures in order, with the passage to its next call.
+
+    "Gap Days" is the time to the vessel's next departure (from "Next Port").
+    It splits into "Sea Days" (until arriving at Next Port, when a leg
+    covers that passage) and "Dwell Days" (alongside at Next Port).
+    """
+    calls = (legs[['Vessel', 'Port of loading', 'Departure']].dropna().drop_duplicates()
+             .sort_values(['Vessel', 'Departure'], kind='stable').reset_index(drop=True))
+    by_vessel = calls.groupby('Vessel', sort=False)
+    calls['Next Port'] = by_vessel['Port of loading'].shift(-1)
+    calls['Next Departure'] = by_vessel['Departure'].shift(-1)
+    passage = (legs.groupby(['Vessel', 'Port of loading', 'Departure', 'Unloading port'], observed=True)['Arrival']
+                   .min().rename('Next Arrival'))
+    calls = calls.join(passage, on=['Vessel', 'Port of loading', 'Departure', 'Next Port'])
+    calls['Gap Days'] = (calls['Next Departure'] - calls['Departure']) / DAY
+    calls['Sea Days'] = (calls['Next Arrival'] - calls['Departure']) / DAY
+    calls['Dwell Days'] = (calls['Next Departure'] - calls['Next Arrival']) / DAY
+    return calls
+
+
+def round_trips(legs: pd.DataFrame, home: str):
+    """Every completed home-port round trip, for all vessels at once.
+
+    A cycle starts at each departure from ``home`` and ends at the vessel's
+    next departure from ``home``; calls before a vessel's first home
+    departure and its last, unfinished cycle are left out. Returns
+    ``(cycles, calls)``: one row per cycle with Cycle/Sea/Dwell Days and the
+    ports called, and the numbered port calls the cycles were built from.
+    """
+    calls = port_calls(legs)
+    at_home = (calls['Port of loading'] == home).astype(int)
+    calls['Cycle'] = at_home.groupby(calls['Vessel'], sort=False).cumsum()
+    last = calls.groupby('Vessel', sort=False)['Cycle'].transform('max')
+    calls = calls[(calls['Cycle'] > 0) & (calls['Cycle'] < last)]
+
+    grouped = calls.groupby(['Vessel', 'Cycle'], sort=False)
+    cycles = grouped.agg(**{
+        'Start': ('Departure', 'first'),
+        'End': ('Next Departure', 'last'),
+        'Calls': ('Departure', 'size'),
+        'Cycle Days': ('Gap Days', 'sum'),
+        'Sea Days': ('Sea Days', 'sum'),
+        'Dwell Days': ('Dwell Days', 'sum'),
+    })
+    # sea/dwell only when every passage in the cycle has a known arrival
+    complete = grouped['Sea Days'].count() == cycles['Calls']
+    cycles[['Sea Days', 'Dwell Days']] = cycles[['Sea Days', 'Dwell Days']].where(complete, axis=0)
+    # calls are contiguous per cycle, so the port lists are plain slices
+    ports = calls['Next Port'].tolist()
+    ends = np.cumsum(cycles['Calls'].to_numpy())
+    cycles['Ports'] = [' → '.join([home] + ports[end - n:end]) for n, end in zip(cycles['Calls'], ends)]
+    return cycles.reset_index(), calls
+
+
+def distribution(frame: pd.DataFrame, by, columns) -> pd.DataFrame:
+    """Count/mean/median/p90/min/max of each of ``columns`` per ``by`` group."""
+    grouped = frame.groupby(by)[columns]
+    stats = pd.concat({
+        'count': grouped.count(), 'mean': grouped.mean(), 'median': grouped.median(),
+        'p90': grouped.quantile(0.9), 'min': grouped.min(), 'max': grouped.max(),
+    }, axis=1).swaplevel(axis=1)
+    return stats[columns].round(1)
+
+
+def port_call_counts(legs: pd.DataFrame) -> pd.DataFrame:
+    """Calls per (Unloading port, Vessel)."""
+    return legs.groupby(['Unloading port', 'Vessel']).size().reset_index(name='Calls')
+
+
+def port_vessel_counts(legs: pd.DataFrame) -> pd.DataFrame:
+    """Distinct vessels calling at each unloading port."""
+    return legs.groupby('Unloading port')['Vessel'].nunique().reset_index(name='Unique Vessels')
@@ -1,38 +1,119 @@
 import pandas as pd
 import streamlit as st
 
+from analytics import instrument, snapshot
+from analytics.container_index import ContainerIndex, check_digits, normalise, split_input
+from analytics.data_version import DataWatcher
+from analytics.timeline import TIMELINE_COLUMNS, ActivityTimeline
+
+# Rows rendered per results page; the full result is only sent as a download
+PAGE_SIZE = 500
+
+FILE_PATH = 'ContainerActivity.xlsx'
+SHEET_NAME = 'Sheet1'  # Adjust if needed
+
 # Load data from Excel
-@st.cache_data
-def load_data():
-    # Load your Excel data
-    file_path = 'ContainerActivity.xlsx'
-    sheet_name = 'Sheet1'  # Adjust if needed
-    df = pd.read_excel(file_path)
+@st.cache_data(max_entries=2)
+@instrument.timed('load activity', 'load')
+def load_data(version):
+    # Load your Excel data (parsed once per workbook version, see analytics/snapshot.py)
+    df = snapshot.load_activity(FILE_PATH, sheet_name=SHEET_NAME, columns=['Company', 'Container #'])
     return df
 
+@st.cache_resource(max_entries=2)
+@instrument.timed('build index', 'aggregate')
+def load_index(version):
+    # normalised-number index, built once per data version
+    return ContainerIndex(load_data(version))
+
+@st.cache_resource(max_entries=2)
+@instrument.timed('build timeline', 'load')
+def load_timeline(version):
+    # every activity row, sorted by (Container #, Activity Date) once for journey drill-downs
+    columns = [c for c in TIMELINE_COLUMNS if c in snapshot.available_columns(FILE_PATH, SHEET_NAME)]
+    return ActivityTimeline(snapshot.load_activity(FILE_PATH, sheet_name=SHEET_NAME, columns=columns))
+
+@st.cache_resource
+def get_watcher():
+    # one per process: a new workbook/store version rebuilds the index in the background first
+    watcher = DataWatcher([FILE_PATH])
+    watcher.on_change(load_index)
+    return watcher.start()
+
+def validation_report(numbers):
+    # ISO 6346 format and check digit, so typos are reported instead of silently not found
+    checks = check_digits(numbers)
+    bad = checks[~checks['Valid']]
+    problems = bad['Expected Check Digit'].map(
+        lambda d: 'Not an ISO 6346 container number' if pd.isna(d) else f'Check digit should be {int(d)}')
+    return pd.DataFrame({'Container #': numbers.iloc[bad.index].to_numpy(), 'Problem': problems.to_numpy()})
+
+def show_results(results, key='results', file_name='container_search.csv'):
+    pages = max(1, -(-len(results) // PAGE_SIZE))
+    page = st.number_input('Page', min_value=1, max_value=pages, value=1, key=f'{key}_page') if pages > 1 else 1
+    start = (page - 1) * PAGE_SIZE
+    with instrument.stage(f'{key} table', 'render', rows=min(PAGE_SIZE, len(results))):
+        st.dataframe(results.iloc[start:start + PAGE_SIZE])
+    if pages > 1:
+        st.caption(f'Rows {start + 1:,}-{min(start + PAGE_SIZE, len(results)):,} of {len(results):,}')
+        st.download_button('Download all results as CSV', data=instrument.timed(f'{key} csv', 'export')(lambda: results.to_csv(index=False).encode('utf-8')),
+                           file_name=file_name, mime='text/csv', key=f'{key}_download')
+
+def show_journeys(containers, version):
+    timeline = load_timeline(version)
+    with st.expander('Last known state'):
+        show_results(timeline.last_state(containers), key='last_state', file_name='last_known_state.csv')
+    selected = st.selectbox('Trace container journey:', sorted(containers))
+    journey = timeline.journey(selected)
+    st.write(f'{len(journey)} activity record(s) for {selected}:')
+    st.dataframe(journey)
+
 def main():
+    instrument.start_run('app')
     st.set_page_config(page_title='Container Search Tool', layout='centered')
     st.title('🔍 Container Search Tool')
-    st.markdown('Enter one or more container numbers (comma, space, or newline separated) to find their related companies.')
+    st.markdown('Enter one or more container numbers (comma, space, or newline separated) to find their related companies. '
+                'End a number with `*` to search by prefix (e.g. `TRLU67*`).')
 
     # Load data
-    df = load_data()
+    version = get_watcher().token
+    index = load_index(version)
 
     # Input for multiple container numbers
     container_input = st.text_area('Enter Container Numbers:', height=150, placeholder='e.g.\nTRLU6731648\nCCLU7227024')
 
     if container_input:
-        # Normalize input into a list of container numbers
-        containers = [c.strip().upper() for c in container_input.replace(',', '\n').split('\n') if c.strip()]
+        # Normalize input into container numbers and prefix searches
+        tokens = split_input(container_input)
+        prefixes = [t[:-1] for t in tokens if t.endswith('*')]
+        containers = normalise([t for t in tokens if not t.endswith('*')]).drop_duplicates().reset_index(drop=True)
 
-        # Filter the dataframe
-        filtered = df[df['Container #'].str.upper().isin(containers)]
+        invalid = validation_report(containers)
+        if not invalid.empty:
+            st.warning(f'{len(invalid)} number(s) fail ISO 6346 validation - check for typos.')
+            with st.expander('Invalid container numbers'):
+                st.dataframe(invalid)
+
+        # Look up the index
+        with instrument.stage('lookup', 'filter') as lookup:
+            filtered, missing = index.lookup(containers)
+            if prefixes:
+                filtered = pd.concat([filtered] + [index.prefix(p) for p in prefixes])
+                filtered = filtered[~filtered.index.duplicated()]
+            lookup.rows = len(filtered)
+        missing = sorted(set(missing) - set(invalid['Container #']))
+        if missing:
+            with st.expander(f'{len(missing)} valid number(s) not found'):
+                st.write(', '.join(missing))
 
         if not filtered.empty:
             st.success(f'{len(filtered)} container(s) found.')
-            st.dataframe(filtered[['Company', 'Container #']])
+            show_results(filtered[['Company', 'Container #']])
+            show_journeys(normalise(filtered['Container #']).dropna().unique(), version)
         else:
             st.error('No matching containers found.')
 
+    instrument.panel()
+
 if __name__ == '__main__':
     main()
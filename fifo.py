@@ -1,7 +1,10 @@
 import streamlit as st
-import pandas as pd
 from io import BytesIO
 
+from analytics import fifo_engine, fifo_monitor, instrument
+
+instrument.start_run('fifo')
+
 st.set_page_config(page_title="🚢 FIFO Compliance Analyser", layout="wide")
 st.title("🚢 FIFO Compliance Analyser – Jebel Ali / MYT")
 
@@ -9,74 +12,68 @@ st.title("🚢 FIFO Compliance Analyser – Jebel Ali / MYT")
 # 1 ▸ Upload & sheet selector
 # ------------------------------
 uploaded_file = st.file_uploader("📄 Upload Excel file (MYT)", type=["xlsx"])
-sheet_name    = st.text_input("Sheet name", value="DRY")
+all_sheets    = st.checkbox("Analyse every sheet (region-wide, parallel)")
+sheet_name    = st.text_input("Sheet name", value="DRY", disabled=all_sheets)
 
 @st.cache_data(show_spinner=False)
+@instrument.timed('stream sheet', 'load')
 def load_data(file, sheet):
-    df = pd.read_excel(file, sheet_name=sheet)
-    df.columns = df.columns.str.strip()
-    df["IN DATE"]  = pd.to_datetime(df["IN DATE"],  errors="coerce")
-    df["OUT DATE"] = pd.to_datetime(df["OUT DATE"], errors="coerce")
-    return df[df["IN DATE"].notna()]
+    # streamed read-only: only the FIFO columns, constant parse memory
+    bar = st.progress(0.0, text="Reading sheet…")
+    def progress(read, total):
+        frac = min(read / total, 1.0) if total else 0.0
+        bar.progress(frac, text=f"Reading sheet… {read:,} rows")
+    df = fifo_engine.stream_sheet(file, sheet, progress=progress)
+    bar.empty()
+    return df
+
+@st.cache_data(show_spinner="Loading every sheet…")
+@instrument.timed('load all sheets', 'load')
+def load_all_data(file):
+    return fifo_engine.load_all_sheets(file.getvalue())
 
 # ------------------------------
-# 2 ▸ FIFO helpers (size + cat + type aware)
+# 2 ▸ FIFO analysis (size + cat + type aware, see analytics/fifo_engine.py)
 # ------------------------------
 
-def fifo_status_and_reason(row, df):
-    if pd.isna(row["OUT DATE"]):
-        return pd.Series(["In Depot", "Still in depot"])
-
-    mask_same_grp = (
-        (df["POL Agent"] == row["POL Agent"]) &
-        (df["POL Port"] == row["POL Port"]) &
-        (df["Category"]  == row["Category"]) &
-        (df["Size"]       == row["Size"]) &
-        (df["Type"]       == row["Type"])
-    )
-
-    older_in_depot = df[mask_same_grp & (df["IN DATE"] < row["IN DATE"]) & df["OUT DATE"].isna()]
-
-    if older_in_depot.empty:
-        return pd.Series(["Yes", "Released in FIFO order"])
-    oldest_date = older_in_depot["IN DATE"].min().date()
-    return pd.Series(["No", f"Older box still in depot (IN < {oldest_date})"])
-
 @st.cache_data(show_spinner=False)
+@instrument.timed('analyse fifo', 'aggregate')
 def analyse_fifo(df):
-    df = df.copy()
-    df[["FIFO Status", "FIFO Break Reason"]] = df.apply(lambda r: fifo_status_and_reason(r, df), axis=1)
-
-    def summary_fn(sub):
-        rel = sub[sub["FIFO Status"].isin(["Yes", "No"])]
-        yes = (rel["FIFO Status"] == "Yes").sum()
-        no  = (rel["FIFO Status"] == "No").sum()
-        pct = round(yes / (yes + no) * 100, 2) if (yes + no) else 0
-        return pd.Series({
-            "In Depot": (sub["FIFO Status"] == "In Depot").sum(),
-            "No": no,
-            "Yes": yes,
-            "Released": yes + no,
-            "FIFO %": pct
-        })
-
-    summary = (df.groupby(["POL Port", "POL Agent"], dropna=False)
-                 .apply(summary_fn)
-                 .reset_index()
-                 .sort_values(["POL Port", "FIFO %"], ascending=[True, False]))
-
-    exceptions = df[df["FIFO Status"] == "No"].copy()
-    return df, summary, exceptions
+    return fifo_engine.analyse_fifo(df)
+
+@st.cache_data(show_spinner="Analysing partitions…")
+@instrument.timed('analyse fifo (parallel)', 'aggregate')
+def analyse_fifo_parallel(df):
+    return fifo_engine.analyse_fifo_parallel(df)
+
+@st.cache_resource(show_spinner=False)
+def get_monitor(df, feed_path):
+    # one live monitor per loaded sheet + feed, shared across sessions
+    return fifo_monitor.FifoMonitor.from_frame(df, feeds=[fifo_monitor.JsonlFeed(feed_path)])
+
+@st.fragment(run_every="5s")
+def live_monitor(monitor):
+    applied = monitor.poll()
+    st.caption(f"{applied} new gate moves applied · {monitor.unmatched} OUT moves without a matching IN"
+               f" · {monitor.rejected} invalid events skipped")
+    st.dataframe(monitor.summary(), use_container_width=True)
+    st.subheader("Live FIFO Exceptions")
+    st.dataframe(monitor.exceptions(), use_container_width=True)
 
 # ------------------------------
 # 3 ▸ Streamlit logic
 # ------------------------------
 if uploaded_file:
     try:
-        raw_df = load_data(uploaded_file, sheet_name)
+        if all_sheets:
+            raw_df, skipped_sheets = load_all_data(uploaded_file)
+        else:
+            raw_df = load_data(uploaded_file, sheet_name)
     except Exception as e:
         st.error(f"❌ Failed to load sheet: {e}")
         st.stop()
+    if all_sheets and skipped_sheets:
+        st.warning(f"⚠️ Skipped sheets without the FIFO columns: {', '.join(skipped_sheets)}")
 
     # --- sidebar filters ---
     st.sidebar.header("🔎 Filters")
@@ -85,22 +82,29 @@ if uploaded_file:
     all_ports = sorted(raw_df["POL Port"].dropna().unique())
     port_filter = st.sidebar.selectbox("POL Port", ["All"] + all_ports)
 
-    cat_filter  = st.sidebar.selectbox("Category", sorted(raw_df["Category"].dropna().unique()))
-    size_filter = st.sidebar.selectbox("Size", sorted(raw_df["Size"].dropna().unique()))
+    if not all_sheets:
+        cat_filter  = st.sidebar.selectbox("Category", sorted(raw_df["Category"].dropna().unique()))
+        size_filter = st.sidebar.selectbox("Size", sorted(raw_df["Size"].dropna().unique()))
+
+        # Type options filtered by selected Category + Size
+        available_types = raw_df[(raw_df["Category"] == cat_filter) & (raw_df["Size"] == size_filter)]["Type"].dropna().unique()
+        type_filter     = st.sidebar.multiselect("Type", sorted(available_types), default=list(sorted(available_types)))
 
-    # Type options filtered by selected Category + Size
-    available_types = raw_df[(raw_df["Category"] == cat_filter) & (raw_df["Size"] == size_filter)]["Type"].dropna().unique()
-    type_filter     = st.sidebar.multiselect("Type", sorted(available_types), default=list(sorted(available_types)))
+    # Optional gate-move feed for the live monitor (whole sheet, not the filters above)
+    st.sidebar.header("📡 Live Gate Moves")
+    feed_path = st.sidebar.text_input("Gate event feed (JSONL path)", value="")
 
-    # Apply filter
-    f_df = raw_df[
-        ((raw_df["POL Port"] == port_filter) if port_filter != "All" else True) &
-        (raw_df["Category"] == cat_filter) &
-        (raw_df["Size"] == size_filter) &
-        (raw_df["Type"].isin(type_filter))
-    ]
+    if all_sheets:
+        # Region-wide run: every sheet, category, size and type
+        f_df = raw_df if port_filter == "All" else raw_df[raw_df["POL Port"] == port_filter]
+        full_df, summary_df, exceptions_df = analyse_fifo_parallel(f_df)
+    else:
+        # Apply filter
+        with instrument.stage("filter", "filter") as filtering:
+            f_df = fifo_engine.select(raw_df, port_filter, cat_filter, size_filter, type_filter)
+            filtering.rows = len(f_df)
 
-    full_df, summary_df, exceptions_df = analyse_fifo(f_df)
+        full_df, summary_df, exceptions_df = analyse_fifo(f_df)
 
     # --- KPIs ---
     k1, k2, k3, k4 = st.columns(4)
@@ -110,24 +114,36 @@ if uploaded_file:
     fifo_total = round(summary_df["Yes"].sum() / max(1, summary_df["Yes"].sum()+summary_df["No"].sum()) * 100, 2)
     k4.metric("Overall FIFO %", f"{fifo_total}%")
 
-    tab1, tab2, tab3 = st.tabs(["Agent Summary", "Exceptions", "Raw Data"])
+    tab_names = ["Agent Summary", "Exceptions", "Raw Data"] + (["Live Monitor"] if feed_path else [])
+    tab1, tab2, tab3, *live_tab = st.tabs(tab_names)
 
     with tab1:
         st.subheader("Agent‑Port FIFO Summary")
-        st.dataframe(summary_df, use_container_width=True)
-        st.bar_chart(summary_df.set_index("POL Agent")["FIFO %"])
+        with instrument.stage("summary table + chart", "render", rows=len(summary_df)):
+            st.dataframe(summary_df, use_container_width=True)
+            st.bar_chart(summary_df.set_index("POL Agent")["FIFO %"])
 
-        dl1 = BytesIO(); summary_df.to_excel(dl1, index=False)
+        with instrument.stage("summary xlsx", "export", rows=len(summary_df)):
+            dl1 = BytesIO(); summary_df.to_excel(dl1, index=False)
         st.download_button("Download Summary", dl1.getvalue(), file_name="fifo_summary.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
 
     with tab2:
         st.subheader("Containers Breaking FIFO")
         st.dataframe(exceptions_df[["Container #", "POL Port", "POL Agent", "Category", "Size", "Type", "IN DATE", "OUT DATE", "FIFO Break Reason"]], use_container_width=True)
-        dl2 = BytesIO(); exceptions_df.to_excel(dl2, index=False)
+        with instrument.stage("exceptions xlsx", "export", rows=len(exceptions_df)):
+            dl2 = BytesIO(); exceptions_df.to_excel(dl2, index=False)
         st.download_button("Download Exceptions", dl2.getvalue(), file_name="fifo_exceptions.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
 
     with tab3:
         st.subheader("Filtered Raw Data with FIFO Status")
-        st.dataframe(full_df, use_container_width=True)
+        with instrument.stage("raw data table", "render", rows=len(full_df)):
+            st.dataframe(full_df, use_container_width=True)
+
+    if feed_path:
+        with live_tab[0]:
+            st.subheader("Live Agent‑Port FIFO Summary")
+            live_monitor(get_monitor(raw_df, feed_path))
 else:
     st.info("👈 Upload an Excel file to begin analysis")
+
+instrument.panel()
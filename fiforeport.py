@@ -2,20 +2,38 @@ import streamlit as st
 import pandas as pd
 import openpyxl  # Add this import for openpyxl support
 
-@st.cache_data
-def load_data():
-    # Load the Excel data from the specified file path
-    file_path = 'ContainerActivity1.xlsx'  # Adjust the path as necessary
-    return pd.read_excel(file_path, usecols=['Container #', 'POL Port', 'POL Agent', 'Size', 'Ageing Days', 'Activity Mode', 'Type'])
+from analytics import instrument, snapshot
+from analytics.data_version import DataWatcher
+from analytics.release_allocator import BATCH_COLUMNS, CONTAINER_TYPES, ReleaseAllocator
 
-# Load the Excel data
-df = load_data()
+file_path = 'ContainerActivity1.xlsx'  # Adjust the path as necessary
+
+@st.cache_data(max_entries=2)
+@instrument.timed('load activity', 'load')
+def load_data(version):
+    # Load the Excel data from the specified file path (via its Parquet snapshot)
+    return snapshot.load_activity(file_path, columns=['Container #', 'POL Port', 'POL Agent', 'Size', 'Ageing Days', 'Activity Mode', 'Type'])
+
+@st.cache_resource(max_entries=2)
+@instrument.timed('build allocator', 'aggregate')
+def get_allocator(version):
+    # built once per data version; pools are added as requests come in
+    return ReleaseAllocator(load_data(version))
+
+@st.cache_resource
+def get_watcher():
+    # one per process: the next version's snapshot is parsed in the background before it is used
+    watcher = DataWatcher([file_path])
+    watcher.on_change(get_allocator)
+    return watcher.start()
+
+instrument.start_run('fiforeport')
+
+# Current data version; the Excel data is loaded with the allocator
+version = get_watcher().token
 
 # Define the container type categories
-container_types = {
-    'SPECIAL': ['Flat Rack', 'Open Top', 'Reefer', 'Standard'],
-    'DRY': ['Heavy Duty', 'Hi-Cube']
-}
+container_types = CONTAINER_TYPES
 
 # User input section
 st.title("Release Container on FIFO")
@@ -26,104 +44,72 @@ input_quantity = st.number_input('Enter Quantity:', min_value=1)
 # Dropdown menu for container type selection
 selected_container_type = st.selectbox('Select Container Type:', [''] + list(container_types.keys()))
 
-# Initialize the agents_summary list
-agents_summary = []
+selected_types = container_types.get(selected_container_type)
 
-# Filter data based on input
-if selected_container_type:
-    if selected_container_type == 'SPECIAL':
-        selected_types = container_types['SPECIAL']
-    elif selected_container_type == 'DRY':
-        selected_types = container_types['DRY']
-    else:
-        selected_types = []
-
-    filtered_data = df[(df['POL Port'] == input_port) & 
-                       (df['Size'] == input_size) & 
-                       (df['Activity Mode'] == 'Empty') & 
-                       (df['Type'].isin(selected_types))]
-else:
-    filtered_data = df[(df['POL Port'] == input_port) & 
-                       (df['Size'] == input_size) & 
-                       (df['Activity Mode'] == 'Empty')]
+# Candidate pool for this port / size / type group (sorted once, then cached)
+allocator = get_allocator(version)
+with instrument.stage('candidate pool', 'filter') as candidates:
+    pool = allocator.pool(input_port, input_size, selected_types)
+    candidates.rows = pool.total
 
 # Check if there are any available containers
-if filtered_data.empty:
+if pool.total == 0:
     st.write("No containers available for the selected port, size, and type.")
 else:
-    # Group the data by POL Agent
-    grouped_data = filtered_data.groupby('POL Agent').agg({
-        'Container #': 'count',  # Count of containers available
-        'Ageing Days': 'mean'     # Calculate average ageing days
-    }).reset_index()
-
-    # Filter agents that can fulfill the requested quantity
-    suitable_agents = grouped_data[grouped_data['Container #'] >= input_quantity]
-
-    if not suitable_agents.empty:
-        best_agent = None
-        highest_average_ageing = 0
-        
-        for index, row in suitable_agents.iterrows():
-            # Get containers for the current agent
-            agent_containers = filtered_data[filtered_data['POL Agent'] == row['POL Agent']]
-            # Sort by Ageing Days in descending order
-            sorted_containers = agent_containers.sort_values(by='Ageing Days', ascending=False)
-
-            # Check if we can get the top 'input_quantity' containers
-            if len(sorted_containers) >= input_quantity:
-                # Calculate average ageing days for the selected quantity
-                average_ageing = sorted_containers.head(input_quantity)['Ageing Days'].mean()
-                
-                # Compare with the highest average ageing found
-                if average_ageing > highest_average_ageing:
-                    highest_average_ageing = average_ageing
-                    best_agent = row
-
-        if best_agent is not None:
-            st.write(f"Assigned Agent: {best_agent['POL Agent']} - Available Containers: {best_agent['Container #']}")
-        else:
-            st.write("No agent has sufficient containers to fulfill the request.")
+    with instrument.stage('release', 'aggregate'):
+        best_agent, report_df = pool.release(input_quantity)
+
+    if best_agent is not None:
+        available = pool.agent_summary().set_index('POL Agent').loc[best_agent, 'Available Containers']
+        st.write(f"Assigned Agent: {best_agent} - Available Containers: {available}")
+    elif report_df is not None:
+        # No single agent can fulfill the request: release the oldest boxes across agents
+        agents_summary = (report_df.groupby('POL Agent', observed=True)['Ageing Days']
+                                   .agg(['count', 'mean'])
+                                   .sort_values('count', ascending=False))
+
+        st.write("The following agents can collectively fulfill the request:")
+        for agent_name, agent_detail in agents_summary.iterrows():
+            st.write(f"{agent_name} - Containers: {agent_detail['count']:.0f} - Average Aging: {agent_detail['mean']:.2f} Days")
+    else:
+        st.write("No agent has sufficient containers to fulfill the request.")
+
+    # Exact release list for download
+    if report_df is not None:
+        with instrument.stage('report csv', 'export', rows=len(report_df)):
+            report_csv = report_df.to_csv(index=False).encode('utf-8')
+        st.download_button(
+            label="Download Report as CSV",
+            data=report_csv,
+            file_name='agent_report.csv',
+            mime='text/csv',
+        )
+
+# Batch mode: allocate a whole booking list at once, no box given twice
+st.header("Batch Release Planning")
+st.caption(f"Upload a CSV with columns: {', '.join(BATCH_COLUMNS)} (Container Type: DRY, SPECIAL or blank for any). "
+           "Bookings are served in file order, oldest containers first.")
+batch_file = st.file_uploader("Upload booking requests (CSV)", type=["csv"])
+
+if batch_file is not None:
+    try:
+        with instrument.stage('plan batch', 'aggregate') as planning:
+            allocations, batch_summary = get_allocator(version).plan_batch(pd.read_csv(batch_file))
+            planning.rows = len(allocations)
+    except ValueError as e:
+        st.error(str(e))
     else:
-        # If no single agent can fulfill the request, we need to use multiple agents
-        cumulative_containers = 0
-        
-        # Sort agents by container count in descending order
-        sorted_agents = grouped_data.sort_values(by=['Container #'], ascending=False)
-
-        for index, row in sorted_agents.iterrows():
-            if cumulative_containers < input_quantity:
-                cumulative_containers += row['Container #']
-                agent_name = row['POL Agent']
-                agents_summary.append({
-                    "Agent Name": agent_name,
-                    "Available Containers": row['Container #'],
-                    "Average Aging": filtered_data[filtered_data['POL Agent'] == agent_name]['Ageing Days'].mean()
-                })
-
-        if cumulative_containers >= input_quantity:
-            st.write("The following agents can collectively fulfill the request:")
-            for agent_detail in agents_summary:
-                st.write(f"{agent_detail['Agent Name']} - Average Aging: {agent_detail['Average Aging']:.2f} Days")
-
-            # Prepare detailed report for download
-            report_data = []
-            for agent in agents_summary:
-                # Get all containers for this agent
-                agent_data = filtered_data[filtered_data['POL Agent'] == agent['Agent Name']]
-                for _, row in agent_data.iterrows():
-                    report_data.append(row)
-
-            # Create DataFrame for the report
-            report_df = pd.DataFrame(report_data)
-
-            # Generate the CSV file and provide download button
-            if not report_df.empty:
-                st.download_button(
-                    label="Download Report as CSV",
-                    data=report_df.to_csv(index=False).encode('utf-8'),
-                    file_name='agent_report.csv',
-                    mime='text/csv',
-                )
-        else:
-            st.write("No agent has sufficient containers to fulfill the request.")
+        short = batch_summary[batch_summary['Shortfall'] > 0]
+        st.write(f"{len(allocations)} containers allocated to {len(batch_summary)} bookings; "
+                 f"{len(short)} bookings short.")
+        st.dataframe(batch_summary)
+        with instrument.stage('release plan csv', 'export', rows=len(allocations)):
+            plan_csv = allocations.to_csv(index=False).encode('utf-8')
+        st.download_button(
+            label="Download Release Plan as CSV",
+            data=plan_csv,
+            file_name='release_plan.csv',
+            mime='text/csv',
+        )
+
+instrument.panel()
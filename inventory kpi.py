@@ -1,8 +1,14 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
+import hashlib
+
 import plotly.express as px
 
+from analytics import chart_render, instrument, kpi_engine
+from analytics.kpi_rollups import RollupStore
+
+instrument.start_run("inventory kpi")
 st.set_page_config(page_title="📈 Inventory KPI Dashboard", layout="wide")
 
 st.title("📦 Inventory Performance KPI Dashboard")
@@ -21,122 +27,118 @@ activity_file = st.file_uploader("📤 Upload Activity Data", type=["xlsx", "xls
 map_file = st.file_uploader("🗺️ Upload POL-Port Mapping", type=["xlsx", "xls", "csv"])
 
 @st.cache_data(show_spinner=False)
+@instrument.timed("read upload", "load")
 def load_data(file):
     if file is None:
         return None
     return pd.read_excel(file) if file.name.endswith(('xlsx', 'xls')) else pd.read_csv(file)
 
-activity_df = load_data(activity_file)
-map_df = load_data(map_file)
-
-if activity_df is not None and map_df is not None:
+@st.cache_resource(show_spinner=False, max_entries=2)
+@instrument.timed("clean, merge and index", "load")
+def build_index(activity_id, map_id, _activity_file, _map_file):
+    # Loaded, cleaned, merged and bitmap-indexed once per pair of uploads (keyed by upload id)
+    merged = kpi_engine.merge_mapping(load_data(_activity_file), load_data(_map_file))
+    return kpi_engine.FilterIndex(merged)
+
+@st.cache_resource
+def get_rollups():
+    # Daily partial aggregates of every upload so far, shared by all sessions
+    return RollupStore()
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+@instrument.timed("merge into rollups", "aggregate")
+def merge_upload(activity_id, map_id, _activity_file, _map_file, _index):
+    # Same files uploaded again (in any session) merge only once
+    source_id = hashlib.sha256(_activity_file.getvalue() + _map_file.getvalue()).hexdigest()
+    return get_rollups().merge(source_id, kpi_engine.GroupingSets(_index.df).cube)
+
+rollups = get_rollups()
+index = None
+if activity_file is not None and map_file is not None:
     # ── Clean and Prepare ─────────────────────────────────────
-    activity_df.columns = activity_df.columns.str.strip()
-    map_df.columns = map_df.columns.str.strip()
-
-    activity_df["Activity Date"] = pd.to_datetime(activity_df["Activity Date"], errors="coerce")
-    activity_df["System Date"] = pd.to_datetime(activity_df["System Date"], errors="coerce")
-    activity_df["Delay (Days)"] = (activity_df["System Date"] - activity_df["Activity Date"]).dt.days
-
-    def classify(delay):
-        if pd.isna(delay): return "Missing"
-        if delay <= 2: return "Excellent"
-        elif delay < 3: return "Good"
-        elif delay < 4: return "Average"
-        else: return "Need Improvement"
-
-    activity_df["Performance"] = activity_df["Delay (Days)"].apply(classify)
-
-    merged = activity_df.merge(map_df, how="left", on="POL Port")
-    merged["Month"] = merged["Activity Date"].dt.to_period("M")
-    merged["Quarter"] = merged["Activity Date"].dt.to_period("Q")
-    merged["Week"] = merged["Activity Date"].dt.isocalendar().week
-    merged["Date"] = merged["Activity Date"].dt.date
-    merged["WeekStart"] = merged["Activity Date"] - pd.to_timedelta(merged["Activity Date"].dt.weekday, unit="d")
-    merged["Week Range"] = merged["WeekStart"].dt.strftime('%d %b') + " - " + (merged["WeekStart"] + pd.Timedelta(days=6)).dt.strftime('%d %b')
+    index = build_index(activity_file.file_id, map_file.file_id, activity_file, map_file)
+    merge_upload(activity_file.file_id, map_file.file_id, activity_file, map_file, index)
 
+if index is not None or not rollups.empty:
     # ── Filters ───────────────────────────────────────────────
     st.sidebar.header("🔍 Filters")
-    region_f = st.sidebar.multiselect("🌍 Region", sorted(merged["Region"].dropna().unique()))
-    lead_f = st.sidebar.multiselect("👤 Lead", sorted(merged["Lead"].dropna().unique()))
-    sub_f = st.sidebar.multiselect("👥 Subordinate", sorted(merged["subordinate"].dropna().unique()))
-    port_f = st.sidebar.multiselect("🛳️ POL Port", sorted(merged["POL Port"].dropna().unique()))
+    sources = (["Current upload"] if index is not None else []) + (["Rollup history"] if not rollups.empty else [])
+    source = st.sidebar.radio("🗄️ Data", sources, help="Rollup history covers every upload so far, by whole day")
+    options = index.options if source == "Current upload" else rollups.options
+    region_f = st.sidebar.multiselect("🌍 Region", options("Region"))
+    lead_f = st.sidebar.multiselect("👤 Lead", options("Lead"))
+    sub_f = st.sidebar.multiselect("👥 Subordinate", options("subordinate"))
+    port_f = st.sidebar.multiselect("🛳️ POL Port", options("POL Port"))
     dates = st.sidebar.date_input("📅 Activity Date Range", [])
-
-    filt = merged.copy()
-    if region_f: filt = filt[filt["Region"].isin(region_f)]
-    if lead_f: filt = filt[filt["Lead"].isin(lead_f)]
-    if sub_f: filt = filt[filt["subordinate"].isin(sub_f)]
-    if port_f: filt = filt[filt["POL Port"].isin(port_f)]
-    if len(dates) == 2:
-        filt = filt[(filt["Activity Date"] >= pd.to_datetime(dates[0])) & (filt["Activity Date"] <= pd.to_datetime(dates[1]))]
-
-    def get_rating(avg):
-        if pd.isna(avg): return "Missing"
-        elif avg <= 2: return "Excellent"
-        elif avg < 3: return "Good"
-        elif avg < 4: return "Average"
-        else: return "Need Improvement"
+    period = st.sidebar.selectbox("🗓️ Trend granularity", list(kpi_engine.TREND_PERIODS))
+
+    start, end = (pd.to_datetime(dates[0]), pd.to_datetime(dates[1])) if len(dates) == 2 else (None, None)
+    filters = {"Region": region_f, "Lead": lead_f, "subordinate": sub_f, "POL Port": port_f}
+    if source == "Current upload":
+        # Bitmap AND over the selected values plus a binary-searched date range
+        with instrument.stage("select", "filter") as selection:
+            rows = index.select(filters, start, end)
+            selection.rows = len(rows)
+        with instrument.stage("grouping sets", "aggregate", rows=len(rows)):
+            kpis = kpi_engine.GroupingSets(index.df, rows)
+    else:
+        # Straight from the stored daily rollups; no raw rows involved
+        with instrument.stage("rollup query", "aggregate"):
+            kpis = rollups.query(filters, start, end)
+    totals = kpis.totals()
 
     # ── Summary KPIs ──────────────────────────────────────────
     st.markdown("### 🚀 Overall Performance Summary")
     col1, col2, col3, col4, col5 = st.columns(5)
-    col1.metric("Total Activities", len(filt))
-    col2.metric("Excellent (<=2d)", (filt["Performance"] == "Excellent").sum())
-    col3.metric("Good (2<d<3)", (filt["Performance"] == "Good").sum())
-    col4.metric("Average (3<=d<4)", (filt["Performance"] == "Average").sum())
-    col5.metric("Need Improve (>=4d)", (filt["Performance"] == "Need Improvement").sum())
+    col1.metric("Total Activities", totals["Rows"])
+    col2.metric("Excellent (<=2d)", totals["Excellent"])
+    col3.metric("Good (2<d<3)", totals["Good"])
+    col4.metric("Average (3<=d<4)", totals["Average"])
+    col5.metric("Need Improve (>=4d)", totals["Need Improvement"])
 
     # ── Subordinate Table ─────────────────────────────────────
     st.markdown("### 👥 Subordinate Performance")
-    sub_tbl = filt.groupby("subordinate").agg(
-        Total_Activities=("Delay (Days)", "count"),
-        Avg_Delay=("Delay (Days)", "mean")
-    ).round(2).reset_index()
-    sub_tbl["Rating"] = sub_tbl["Avg_Delay"].apply(get_rating)
+    sub_tbl = kpis.level("subordinate")
     st.dataframe(sub_tbl, use_container_width=True)
 
     # ── Lead & Region Performance ─────────────────────────────
     for level in ["Lead", "Region"]:
         st.markdown(f"### 👤 {level} Performance")
-        df = filt.groupby(level).agg(
-            Total_Activities=("Delay (Days)", "count"),
-            Average_Delay=("Delay (Days)", "mean")
-        ).round(2).reset_index()
-        df["Rating"] = df["Average_Delay"].apply(get_rating)
+        df = kpis.level(level, average="Average_Delay")
         st.dataframe(df, use_container_width=True)
 
     # ── POL Port Performance ─────────────────────────────────
     st.markdown("### 🧭 POL Port Performance — Average delay & rating")
-    port_tbl = filt.groupby("POL Port").agg(
-        Total_Activities=("Delay (Days)", "count"),
-        Avg_Delay=("Delay (Days)", "mean")
-    ).round(2).reset_index()
-    port_tbl["Rating"] = port_tbl["Avg_Delay"].apply(get_rating)
+    port_tbl = kpis.level("POL Port")
     st.dataframe(port_tbl, use_container_width=True)
 
-    fig = px.bar(port_tbl, x="POL Port", y="Avg_Delay", color="Rating",
-                 title="Average Delay by POL Port", labels={"Avg_Delay": "Avg Delay (Days)"})
-    fig.update_layout(xaxis_tickangle=-45, height=400)
-    st.plotly_chart(fig, use_container_width=True)
+    with instrument.stage("port chart", "render", rows=len(port_tbl)):
+        fig = px.bar(port_tbl, x="POL Port", y="Avg_Delay", color="Rating",
+                     title="Average Delay by POL Port", labels={"Avg_Delay": "Avg Delay (Days)"})
+        fig.update_layout(xaxis_tickangle=-45, height=400)
+        st.plotly_chart(fig, use_container_width=True)
 
     # ── Subordinate vs POL Port Heatmap ──────────────────────
     st.markdown("### 🔥 Average Delay Heatmap (Subordinate vs POL Port)")
-    combo = filt.groupby(["subordinate", "POL Port"]).agg(
-        Avg_Delay=("Delay (Days)", "mean")
-    ).round(2).reset_index()
-    if not combo.empty:
-        pivot = combo.pivot(index="subordinate", columns="POL Port", values="Avg_Delay")
-        heat = px.imshow(pivot, text_auto=True, aspect="auto", color_continuous_scale="Blues",
-                         title="Subordinate vs POL Port — Avg Delay Heatmap")
-        st.plotly_chart(heat, use_container_width=True)
+    # Axes capped to the busiest subordinates/ports (rest merged into "Other") and ordered by delay
+    with instrument.stage("heatmap", "render"):
+        pivot = chart_render.capped_heatmap(kpis.cube, "subordinate", "POL Port")
+        if not pivot.empty:
+            heat = px.imshow(pivot, text_auto=chart_render.text_auto(pivot), aspect="auto", color_continuous_scale="Blues",
+                             title="Subordinate vs POL Port — Avg Delay Heatmap")
+            st.plotly_chart(heat, use_container_width=True)
 
     # ── Daily Trend Chart ─────────────────────────────────────
-    st.markdown("### 📊 Daily Average Delay Trend")
-    trend = filt.groupby("Date")["Delay (Days)"].mean().round(2).reset_index()
-    line = px.line(trend, x="Date", y="Delay (Days)", markers=True,
-                   title="Daily Avg Delay Trend", labels={"Delay (Days)": "Avg Delay"})
-    st.plotly_chart(line, use_container_width=True)
+    st.markdown(f"### 📊 {period} Average Delay Trend")
+    # LTTB-downsampled to the chart width, so it always stays a small SVG line
+    with instrument.stage("trend", "render") as trend_stage:
+        trend = chart_render.downsample(kpis.trend(period), "Date", "Delay (Days)")
+        trend_stage.rows = len(trend)
+        line = px.line(trend, x="Date", y="Delay (Days)", markers=True,
+                       title=f"{period} Avg Delay Trend", labels={"Delay (Days)": "Avg Delay"})
+        st.plotly_chart(line, use_container_width=True)
 
 else:
     st.info("⬆️ Please upload both activity and mapping files to begin.")
+
+instrument.panel()
@@ -1,22 +1,85 @@
+from functools import partial
+
 import pandas as pd
 import streamlit as st
-from io import BytesIO
 
-def convert_df_to_excel(df: pd.DataFrame, include_index: bool = True) -> BytesIO:
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=include_index)
-    output.seek(0)
-    return output
+from analytics import exports, instrument, snapshot
+from analytics.container_cube import UTILIZE_ACTIVITIES, myt_rows, on_the_way_rows, summary_cubes, utilized_rows
+from analytics.data_version import DataWatcher
+from analytics.timeline import ActivityTimeline
+
+def download_button(label, file_stem, build_frame, signature, include_index):
+    # The file is only built when clicked, then cached by filter signature (see analytics/exports.py)
+    ext, mime = exports.FORMATS[export_format]
+    st.download_button(
+        label=f"{label} as {export_format}",
+        data=exports.lazy_export((snapshot_file,) + signature, build_frame, export_format, include_index),
+        file_name=f'{file_stem}.{ext}', mime=mime
+    )
 
-# Load your Excel data
+def journey_drilldown(build_rows, agent_column, key):
+    # Latest state of the boxes behind one summary row, then any one box's full history
+    if not st.checkbox("Drill into container journeys", key=f'{key}_drill'):
+        return
+    rows = build_rows()
+    agents = rows[agent_column].dropna().unique().tolist()
+    agent = st.selectbox(f"{agent_column}:", ["ALL"] + sorted(agents), key=f'{key}_agent')
+    if agent != "ALL":
+        rows = rows[rows[agent_column] == agent]
+    containers = rows['Container #'].dropna().unique()
+    if not len(containers):
+        st.write("No containers for this selection.")
+        return
+    timeline = build_timeline(snapshot_file)
+    st.write("Last known state:")
+    with instrument.stage('last state', 'filter', rows=len(containers)):
+        st.dataframe(timeline.last_state(containers))
+    selected = st.selectbox("Container #:", sorted(containers), key=f'{key}_container')
+    st.dataframe(timeline.journey(selected))
+
+@st.cache_resource(max_entries=2)
+@instrument.timed('snapshot', 'load')
+def current_snapshot(version):
+    # hashing the workbook (and re-parsing it if new) happens once per data version
+    return snapshot.snapshot_path(file_path, sheet_name=sheet_name)
+
+@st.cache_resource(max_entries=2)
+@instrument.timed('read snapshot', 'load')
+def load_data(snapshot_file):
+    return pd.read_parquet(snapshot_file)
+
+@st.cache_resource(max_entries=2)
+def build_cubes(snapshot_file):
+    # Built once per snapshot (see analytics/container_cube.py)
+    return summary_cubes(load_data(snapshot_file))
+
+@st.cache_resource(max_entries=2)
+@instrument.timed('build timeline', 'aggregate')
+def build_timeline(snapshot_file):
+    return ActivityTimeline(load_data(snapshot_file))
+
+@st.cache_resource
+def get_watcher():
+    # one per process: a new version's snapshot and cubes are built in the background, then published
+    watcher = DataWatcher([file_path])
+    watcher.on_change(lambda version: build_cubes(current_snapshot(version)))
+    return watcher.start()
+
+instrument.start_run('mty')
+
+# Load your Excel data (parsed once per workbook version, see analytics/snapshot.py)
 file_path = 'ContainerActivity.xlsx'
 sheet_name = 'Sheet1'  # Adjust if needed
-data = pd.read_excel(file_path, sheet_name=sheet_name)
+snapshot_file = current_snapshot(get_watcher().token)
+data = load_data(snapshot_file)
+cubes = build_cubes(snapshot_file)
 
 # Display the title of the app
 st.title("Container Summary By Humair")
 
+# File format for every download on the page
+export_format = st.radio("Download format:", list(exports.FORMATS), horizontal=True)
+
 # Tab structure for different summaries
 tab1, tab2, tab3 = st.tabs(["MYT Containers", "On The Way", "Utilized"])
 
@@ -35,40 +98,21 @@ with tab1:
     selected_company_myt = st.selectbox("Select Company:", company_options_myt, key='myt_company')
     selected_type_myt = st.selectbox("Select Container Type:", container_type_options, key='myt_type')
 
-    # Filter data for MYT summary
-    myt_data = data[data['Activity Mode'] == 'Empty']
-    if selected_type_myt == "Dry":
-        myt_data = myt_data[myt_data['Type'].isin(['Heavy Duty', 'Hi-Cube'])]
-    elif selected_type_myt == "Special":
-        myt_data = myt_data[myt_data['Type'].isin(['Flat Rack', 'Open Top'])]
-    elif selected_type_myt == "Reefer":
-        myt_data = myt_data[myt_data['Type'] == 'Reefer']
-    elif selected_type_myt == "ISO":
-        myt_data = myt_data[myt_data['Type'] == 'Standard']
-
-    filtered_myt = myt_data[
-        (myt_data['Region Name'] == selected_region_myt) &
-        (myt_data['POL Port'].isin(pol_options_myt if selected_pol_myt == "ALL" else [selected_pol_myt])) &
-        (myt_data['Company'].isin(company_options_myt if selected_company_myt == "ALL" else [selected_company_myt]))
-    ]
-
-    myt_pivot_summary = pd.pivot_table(
-        filtered_myt, values='Container #', index='POL Agent', columns='Size', aggfunc='count', fill_value=0
-    )
-    myt_pivot_summary['Grand Total'] = myt_pivot_summary.sum(axis=1)
-    myt_pivot_summary.loc['Grand Total'] = myt_pivot_summary.sum()
+    myt_pivot_summary = cubes['myt'].pivot('POL Agent', {
+        'Type Group': selected_type_myt,
+        'Region Name': selected_region_myt,
+        'POL Port': None if selected_pol_myt == "ALL" else selected_pol_myt,
+        'Company': None if selected_company_myt == "ALL" else selected_company_myt,
+    })
     st.write("MYT Container Summary:")
-    st.dataframe(myt_pivot_summary)
-    excel_myt_file = convert_df_to_excel(myt_pivot_summary, include_index=True)
-    st.download_button(
-        label="Download MYT Summary as Excel", data=excel_myt_file, file_name='myt_summary.xlsx',
-        mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    excel_filtered_myt_file = convert_df_to_excel(filtered_myt, include_index=False)
-    st.download_button(
-        label="Download Filtered MYT Data as Excel", data=excel_filtered_myt_file, file_name='filtered_myt_data.xlsx',
-        mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
+    with instrument.stage('myt table', 'render', rows=len(myt_pivot_summary)):
+        st.dataframe(myt_pivot_summary)
+    myt_filters = (selected_region_myt, selected_pol_myt, selected_company_myt, selected_type_myt)
+    download_button("Download MYT Summary", 'myt_summary',
+                    lambda summary=myt_pivot_summary: summary, ('myt_summary',) + myt_filters, include_index=True)
+    download_button("Download Filtered MYT Data", 'filtered_myt_data',
+                    partial(myt_rows, data, *myt_filters), ('myt_rows',) + myt_filters, include_index=False)
+    journey_drilldown(partial(myt_rows, data, *myt_filters), 'POL Agent', 'myt')
 
 # =================== Tab 2: On The Way ===================
 with tab2:
@@ -95,56 +139,33 @@ with tab2:
     container_type_options = ["Dry", "Special", "Reefer", "ISO"]
     selected_type_on_the_way = st.selectbox("Select Container Type:", container_type_options, key='on_the_way_type')
 
-    # Filter data for Activity Mode "On The Way"
-    on_the_way_data = data[data['Activity Mode'] == 'On The Way']
-    
-    # Filter data based on selected container type
-    if selected_type_on_the_way == "Dry":
-        on_the_way_data = on_the_way_data[on_the_way_data['Type'].isin(['Heavy Duty', 'Hi-Cube'])]
-    elif selected_type_on_the_way == "Special":
-        on_the_way_data = on_the_way_data[on_the_way_data['Type'].isin(['Flat Rack', 'Open Top'])]
-    elif selected_type_on_the_way == "Reefer":
-        on_the_way_data = on_the_way_data[on_the_way_data['Type'] == 'Reefer']
-    elif selected_type_on_the_way == "ISO":
-        on_the_way_data = on_the_way_data[on_the_way_data['Type'] == 'Standard']
-
-    # Filter data based on selected POFD Port and Company
+    # POFD Port(s) for the selected Region Name and POFD Port
     if selected_region_on_the_way == "MIDDLE EAST" and selected_pofd_port == "ALL":
-        filtered_on_the_way = on_the_way_data[on_the_way_data['POFD Port'].isin(middle_east_ports)]
+        pofd_ports = middle_east_ports
     else:
-        filtered_on_the_way = on_the_way_data[on_the_way_data['POFD Port'] == selected_pofd_port]
-    
-    if selected_company_on_the_way != "ALL":
-        filtered_on_the_way = filtered_on_the_way[filtered_on_the_way['Company'] == selected_company_on_the_way]
+        pofd_ports = [selected_pofd_port]
 
-    # Create pivot table for On The Way summary
-    pofd_pivot_summary = pd.pivot_table(
-        filtered_on_the_way, values='Container #', index='POFD Agent', columns='Size', aggfunc='count', fill_value=0
-    )
-    pofd_pivot_summary['Grand Total'] = pofd_pivot_summary.sum(axis=1)
-    pofd_pivot_summary.loc['Grand Total'] = pofd_pivot_summary.sum()
+    # Pivot table for On The Way summary, from the pre-aggregated count cube
+    pofd_pivot_summary = cubes['on_the_way'].pivot('POFD Agent', {
+        'Type Group': selected_type_on_the_way,
+        'POFD Port': pofd_ports,
+        'Company': None if selected_company_on_the_way == "ALL" else selected_company_on_the_way,
+    })
 
     # Display On The Way Container Summary and provide download options
     st.write("On The Way Container Summary:")
-    st.dataframe(pofd_pivot_summary)
+    with instrument.stage('on the way table', 'render', rows=len(pofd_pivot_summary)):
+        st.dataframe(pofd_pivot_summary)
 
-    # Convert pivot summary and filtered data to Excel for download
-    excel_on_the_way_file = convert_df_to_excel(pofd_pivot_summary, include_index=True)
-    st.download_button(
-        label="Download On The Way Summary as Excel", 
-        data=excel_on_the_way_file,
-        file_name='on_the_way_summary.xlsx',
-        mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-
-    # Convert filtered On The Way data to Excel for download
-    excel_filtered_on_the_way_file = convert_df_to_excel(filtered_on_the_way, include_index=False)
-    st.download_button(
-        label="Download Filtered On The Way Data as Excel", 
-        data=excel_filtered_on_the_way_file,
-        file_name='filtered_on_the_way_data.xlsx',
-        mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
+    # Pivot summary and filtered data downloads
+    on_the_way_filters = (tuple(pofd_ports), selected_company_on_the_way, selected_type_on_the_way)
+    download_button("Download On The Way Summary", 'on_the_way_summary',
+                    lambda summary=pofd_pivot_summary: summary, ('on_the_way_summary',) + on_the_way_filters,
+                    include_index=True)
+    download_button("Download Filtered On The Way Data", 'filtered_on_the_way_data',
+                    partial(on_the_way_rows, data, *on_the_way_filters), ('on_the_way_rows',) + on_the_way_filters,
+                    include_index=False)
+    journey_drilldown(partial(on_the_way_rows, data, *on_the_way_filters), 'POFD Agent', 'on_the_way')
 
 
 
@@ -173,56 +194,31 @@ with tab3:
     selected_utilize_type = st.selectbox("Select Utilize Type:", utilize_types, key='utilized_type_selection')
 
     # Set activities based on selected utilize type
-    if selected_utilize_type == "Import Utilize":
-        activities = ['DISCHARGE FULL', 'SENT TO CONSIGNEE']
-    else:
-        activities = ['SENT TO SHIPPER', 'RECEIVE FROM SHIPPER']
+    activities = UTILIZE_ACTIVITIES[selected_utilize_type]
 
-    # Filter data based on selected activities
-    utilized_data = data[data['Activity'].isin(activities)]
-    
-    # Filter based on selected container type
-    if selected_type_utilized == "Dry":
-        utilized_data = utilized_data[utilized_data['Type'].isin(['Heavy Duty', 'Hi-Cube'])]
-    elif selected_type_utilized == "Special":
-        utilized_data = utilized_data[utilized_data['Type'].isin(['Flat Rack', 'Open Top'])]
-    elif selected_type_utilized == "Reefer":
-        utilized_data = utilized_data[utilized_data['Type'] == 'Reefer']
-    elif selected_type_utilized == "ISO":
-        utilized_data = utilized_data[utilized_data['Type'] == 'Standard']
-
-    # Further filtering based on selected Region Name, POL Port, and Company
-    filtered_utilized = utilized_data[
-        (utilized_data['Region Name'] == selected_region_utilized) &
-        (utilized_data['POL Port'].isin(pol_options_utilized if selected_pol_utilized == "ALL" else [selected_pol_utilized])) &
-        (utilized_data['Company'].isin(company_options_utilized if selected_company_utilized == "ALL" else [selected_company_utilized]))
-    ]
-
-    # Create pivot table for Utilized summary
-    utilized_pivot_summary = pd.pivot_table(
-        filtered_utilized, values='Container #', index='POL Agent', columns='Size', aggfunc='count', fill_value=0
-    )
-    utilized_pivot_summary['Grand Total'] = utilized_pivot_summary.sum(axis=1)
-    utilized_pivot_summary.loc['Grand Total'] = utilized_pivot_summary.sum()
+    # Pivot table for Utilized summary, from the pre-aggregated count cube
+    utilized_pivot_summary = cubes['utilized'].pivot('POL Agent', {
+        'Activity': activities,
+        'Type Group': selected_type_utilized,
+        'Region Name': selected_region_utilized,
+        'POL Port': None if selected_pol_utilized == "ALL" else selected_pol_utilized,
+        'Company': None if selected_company_utilized == "ALL" else selected_company_utilized,
+    })
 
     # Display Utilized Container Summary and provide download options
     st.write("Utilized Container Summary:")
-    st.dataframe(utilized_pivot_summary)
-
-    # Convert pivot summary and filtered data to Excel for download
-    excel_utilized_file = convert_df_to_excel(utilized_pivot_summary, include_index=True)
-    st.download_button(
-        label="Download Utilized Summary as Excel",
-        data=excel_utilized_file,
-        file_name='utilized_summary.xlsx',
-        mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-
-    # Convert filtered utilized data to Excel for download
-    excel_filtered_utilized_file = convert_df_to_excel(filtered_utilized, include_index=False)
-    st.download_button(
-        label="Download Filtered Utilized Data as Excel",
-        data=excel_filtered_utilized_file,
-        file_name='filtered_utilized_data.xlsx',
-        mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
+    with instrument.stage('utilized table', 'render', rows=len(utilized_pivot_summary)):
+        st.dataframe(utilized_pivot_summary)
+
+    # Pivot summary and filtered data downloads
+    utilized_filters = (tuple(activities), selected_region_utilized, selected_pol_utilized,
+                        selected_company_utilized, selected_type_utilized)
+    download_button("Download Utilized Summary", 'utilized_summary',
+                    lambda summary=utilized_pivot_summary: summary, ('utilized_summary',) + utilized_filters,
+                    include_index=True)
+    download_button("Download Filtered Utilized Data", 'filtered_utilized_data',
+                    partial(utilized_rows, data, *utilized_filters), ('utilized_rows',) + utilized_filters,
+                    include_index=False)
+    journey_drilldown(partial(utilized_rows, data, *utilized_filters), 'POL Agent', 'utilized')
+
+instrument.panel()
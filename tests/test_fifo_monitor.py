@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from analytics import fifo_engine, synthetic
+from analytics.fifo_monitor import FifoMonitor
+
+
+def _same_summary(df):
+    expected = fifo_engine.analyse_fifo(df)[1]
+    actual = FifoMonitor.from_frame(df).summary()
+    keys = fifo_engine.SUMMARY_KEYS
+    cols = keys + ['In Depot', 'No', 'Yes', 'Released', 'FIFO %']
+    # the engine keeps blank agents as NaN, the monitor as None
+    expected, actual = (t[cols].astype({k: object for k in keys}).fillna({k: '' for k in keys})
+                        .sort_values(keys, ignore_index=True) for t in (expected, actual))
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+def test_monitor_summary_matches_engine():
+    _same_summary(synthetic.myt_dry(3000, seed=3))
+
+
+def test_repeat_visits_and_blank_containers_are_separate_boxes():
+    keys = {'POL Agent': 'A1', 'POL Port': 'AEJEA', 'Category': 'DRY', 'Size': "40'", 'Type': 'GP'}
+    df = pd.DataFrame([
+        dict(keys, **{'Container #': 'A', 'IN DATE': '2024-01-01', 'OUT DATE': '2024-01-10'}),
+        dict(keys, **{'Container #': 'A', 'IN DATE': '2024-03-01', 'OUT DATE': None}),
+        dict(keys, **{'Container #': 'B', 'IN DATE': '2024-02-01', 'OUT DATE': '2024-03-05'}),
+        dict(keys, **{'Container #': np.nan, 'IN DATE': '2024-02-02', 'OUT DATE': None}),
+        dict(keys, **{'Container #': np.nan, 'IN DATE': '2024-02-03', 'OUT DATE': None}),
+    ])
+    df[['IN DATE', 'OUT DATE']] = df[['IN DATE', 'OUT DATE']].apply(pd.to_datetime)
+    _same_summary(df)
+
+    # a live OUT closes the box's open visit, not the earlier one
+    monitor = FifoMonitor.from_frame(df)
+    monitor.apply({'Container #': 'a', 'Move': 'OUT', 'Date': '2024-03-20'})
+    assert monitor.summary()['Released'].sum() == 3
+    assert monitor.unmatched == 0
@@ -0,0 +1,29 @@
+from analytics import kpi_engine, synthetic
+from analytics.kpi_rollups import RollupStore
+
+
+def _upload(activity, mapping):
+    return kpi_engine.GroupingSets(kpi_engine.merge_mapping(activity, mapping)).cube
+
+
+def test_uploads_overlapping_in_time_but_not_scope_are_both_kept(tmp_path):
+    activity, mapping = synthetic.kpi_activity(20_000, seed=1)
+    merged = kpi_engine.merge_mapping(activity, mapping)
+    regions = merged['Region'].dropna().unique()[:2]
+    ports = [merged.loc[merged['Region'] == region, 'POL Port'].unique() for region in regions]
+    first, second = (_upload(activity[activity['POL Port'].isin(p)], mapping) for p in ports)
+
+    store = RollupStore(str(tmp_path))
+    assert store.merge('first', first)
+    assert store.merge('second', second)
+
+    # rows without an Activity Date are not stored
+    expected = sum(cube.loc[cube['Date'].notna(), 'Rows'].sum() for cube in (first, second))
+    assert store.query({}).totals()['Rows'] == expected
+    for region in regions:
+        assert store.query({'Region': [region]}).totals()['Rows'] > 0
+
+    # a re-upload of the same cells replaces them rather than double counting
+    assert store.merge('first again', first)
+    assert store.query({}).totals()['Rows'] == expected
+    assert RollupStore(str(tmp_path)).query({}).totals()['Rows'] == expected
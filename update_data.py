@@ -1,17 +1,31 @@
-import pandas as pd
 import os
+
 import git  # Make sure GitPython is installed
 
+from analytics import snapshot
+from analytics.delta_store import COMPACT_AFTER, DeltaStore
+
 # Define file paths
 local_file_path = r"E:\DashApp\ContainerActivity.xlsx"
 repo_path = r"E:\DashApp"  # Path to your local Git repo
+sheet_name = 'Sheet1'
+
+# Diff the latest export against the last sync; only changed rows are written
+data = snapshot.read_workbook(local_file_path, sheet_name=sheet_name)
+store_path = snapshot.store_dir(os.path.join(repo_path, "ContainerActivity.xlsx"))
+store = DeltaStore(store_path)
+changes = store.sync(data, sheet=sheet_name)
+print(f"{changes['inserted']} inserted, {changes['updated']} updated, {changes['deleted']} deleted")
 
-# Open and save the updated file to ensure it's in the latest state
-data = pd.read_excel(local_file_path)
-data.to_excel(os.path.join(repo_path, "ContainerActivity.xlsx"), index=False)
+if changes['seq'] is not None:
+    # Commit and push just the new delta files (plus the small manifest/state)
+    repo = git.Repo(repo_path)
+    repo.git.add("--all", store_path)
+    repo.index.commit(f"Data sync {changes['seq']}: {changes['inserted']} inserted, "
+                      f"{changes['updated']} updated, {changes['deleted']} deleted")
+    repo.git.push("origin", "master")  # Push to your remote branch (master or main)
 
-# Commit and push the changes
-repo = git.Repo(repo_path)
-repo.git.add("ContainerActivity.xlsx")
-repo.index.commit("Automated update of ContainerActivity.xlsx")
-repo.git.push("origin", "master")  # Push to your remote branch (master or main)
+    # Fold accumulated deltas into the base without holding up this refresh;
+    # the compacted files go out with the next sync's commit
+    if store.pending_deltas() >= COMPACT_AFTER:
+        store.compact_in_background()
@@ -2,105 +2,140 @@
 
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
 import plotly.express as px
-import networkx as nx
-from io import BytesIO
+
+from analytics import chart_render, instrument
+from analytics.data_version import DataWatcher
+from analytics.leg_metrics import PORT_COORDS, PortTable, leg_metrics, vessel_summary
+from analytics.route_map import route_edges, route_map
+from analytics.route_network import RouteNetwork, edge_key
+from analytics.voyages import (VoyageTable, distribution, port_call_counts, port_vessel_counts, read_voyages,
+                              round_trips)
+
+@st.cache_resource(max_entries=2)
+@instrument.timed('load voyages', 'load')
+def load_voyages(file_path, sheet_name, version):
+    # Parsed and sorted once per data version (see analytics/data_version.py), shared by every session
+    return VoyageTable(read_voyages(file_path, sheet_name))
+
+@st.cache_resource(max_entries=32)
+@instrument.timed('route network', 'aggregate')
+def load_network(key):
+    # Graph, seeded layout and centralities, rebuilt only when the filtered edge set changes
+    return RouteNetwork(key)
+
+@st.cache_resource
+def load_ports():
+    # Coordinate arrays and the port-to-port distance matrix, computed once per process
+    return PortTable(PORT_COORDS)
+
+@st.cache_resource
+def get_watcher(file_path, sheet_name):
+    # one per workbook: a changed file is re-read in the background before the new version is used
+    watcher = DataWatcher([file_path])
+    watcher.on_change(lambda version: load_voyages(file_path, sheet_name, version))
+    return watcher.start()
+
+instrument.start_run('vessel')
 
 # Load data
 file_path = 'Ametist.xlsx'
 sheet_name = 'Sheet1'  # Adjust if needed
-df = pd.read_excel(file_path, sheet_name=sheet_name)
-df = df[['Vessel', 'Port of loading', 'Unloading port', 'Departure', 'Arrival']]
-df.dropna(inplace=True)
-
-# Convert dates
-df['Departure'] = pd.to_datetime(df['Departure'], errors='coerce')
-df['Arrival'] = pd.to_datetime(df['Arrival'], errors='coerce')
-
-# Port coordinates
-port_coords = {
-    'NOVOROSSIYSK': (44.7239, 37.7695), 'MERSIN': (36.7990, 34.6400), 'BEIRUT': (33.9017, 35.4866),
-    'ALEXANDRIA (OLDPORT)': (31.2001, 29.9187), 'AMBARLI': (40.9541, 28.7335), 'GEBZE': (40.7976, 29.4304),
-    'ASHDOD': (31.8044, 34.6553), 'HAIFA': (32.7940, 34.9896), 'EL DEKHEILA': (31.1333, 29.8667),
-    'SANKO': (36.8, 34.6), 'DAMIETTA': (31.4167, 31.8167)
-}
+voyages = load_voyages(file_path, sheet_name, get_watcher(file_path, sheet_name).token)
+df = voyages.legs
+
+# Port coordinates (see analytics/leg_metrics.py)
+port_coords = PORT_COORDS
 
 st.set_page_config(layout="wide")
 st.title("🚢 Vessel Route Analyzer & Strategic Planner")
 
 # Sidebar Filters
-vessels = sorted(df['Vessel'].unique())
+vessels = voyages.vessels.tolist()
 selected_vessels = st.sidebar.multiselect("🔍 Select Vessel(s)", vessels, default=vessels[:1])
 date_range = st.sidebar.date_input("📅 Date Range", [df['Departure'].min(), df['Arrival'].max()])
 
 # Filtered Data
-df_filtered = df[df['Vessel'].isin(selected_vessels)]
-df_filtered = df_filtered[(df_filtered['Departure'] >= pd.to_datetime(date_range[0])) & (df_filtered['Arrival'] <= pd.to_datetime(date_range[1]))]
+with instrument.stage('select legs', 'filter') as selection:
+    df_filtered = voyages.select(selected_vessels, pd.to_datetime(date_range[0]), pd.to_datetime(date_range[1]))
+    selection.rows = len(df_filtered)
 
-# SECTION 1: Round-trip duration from origin
+# SECTION 1: Round trips from a home port, every cycle of every selected vessel
 st.header("🔄 Round-trip Analysis")
-for vessel in selected_vessels:
-    st.subheader(f"⛴ {vessel} Round-trip")
-    df_vessel = df_filtered[df_filtered['Vessel'] == vessel]
-    df_novo = df_vessel[(df_vessel['Port of loading'] == 'NOVOROSSIYSK') | (df_vessel['Unloading port'] == 'NOVOROSSIYSK')].sort_values('Departure')
-    if len(df_novo) >= 2:
-        start = df_novo.iloc[0]['Departure']
-        end = df_novo.iloc[-1]['Arrival']
-        duration = (end - start).days
-        st.success(f"Round-trip from NOVOROSSIYSK took **{duration} days**.")
-    else:
-        st.warning("Not enough NOVOROSSIYSK data for round-trip calculation.")
+home_ports = sorted(set(df['Port of loading']))
+home_port = st.selectbox("🏠 Home port", home_ports,
+                         index=home_ports.index('NOVOROSSIYSK') if 'NOVOROSSIYSK' in home_ports else 0)
+with instrument.stage('round trips', 'aggregate') as segmenting:
+    cycles, calls = round_trips(df_filtered, home_port)
+    segmenting.rows = len(cycles)
+no_cycles = sorted(set(selected_vessels) - set(cycles['Vessel']))
+if no_cycles:
+    st.warning(f"Not enough {home_port} data for a complete round trip: {', '.join(no_cycles)}")
+if not cycles.empty:
+    st.subheader("⛴ Round trips")
+    st.dataframe(cycles, use_container_width=True)
+    st.subheader("⏱ Cycle, sea and dwell time per vessel (days)")
+    st.dataframe(distribution(cycles, 'Vessel', ['Cycle Days', 'Sea Days', 'Dwell Days']), use_container_width=True)
+    with instrument.stage('cycle box plot', 'render', rows=len(cycles)):
+        fig_cycles = px.box(cycles, x='Vessel', y='Cycle Days', points='all', title=f'Round-trip Time from {home_port}')
+        st.plotly_chart(fig_cycles, use_container_width=True)
+    st.subheader("⚓ Port dwell per port (days)")
+    st.dataframe(distribution(calls, 'Next Port', ['Dwell Days']), use_container_width=True)
 
 # SECTION 2: Interactive Route Map
 st.header("🗺️ Route Map")
-fig = go.Figure()
-for _, row in df_filtered.iterrows():
-    origin, dest = row['Port of loading'], row['Unloading port']
-    if origin in port_coords and dest in port_coords:
-        lat0, lon0 = port_coords[origin]
-        lat1, lon1 = port_coords[dest]
-        fig.add_trace(go.Scattermapbox(
-            lat=[lat0, lat1], lon=[lon0, lon1], mode="lines+markers",
-            line=dict(width=2),
-            hoverinfo="text", text=f"{row['Vessel']}\n{origin} → {dest}<br>{row['Departure'].date()} to {row['Arrival'].date()}"
-        ))
-for port, (lat, lon) in port_coords.items():
-    fig.add_trace(go.Scattermapbox(lat=[lat], lon=[lon], mode='markers+text',
-        marker=dict(size=8, color='red'), text=[port], textposition='top center'))
-fig.update_layout(mapbox=dict(style='open-street-map', center=dict(lat=34.5, lon=35), zoom=4), margin=dict(l=0, r=0, t=0, b=0))
-st.plotly_chart(fig, use_container_width=True)
+# Legs collapsed into unique routes; line width by traffic, hover on each route's midpoint
+with instrument.stage('route edges', 'aggregate') as edge_stage:
+    edges = route_edges(df_filtered)
+    edge_stage.rows = len(edges)
+with instrument.stage('route map', 'render', rows=len(edges)):
+    fig = route_map(edges, port_coords)
+    fig.update_layout(map=dict(style='open-street-map', center=dict(lat=34.5, lon=35), zoom=4), margin=dict(l=0, r=0, t=0, b=0))
+    st.plotly_chart(fig, use_container_width=True)
+
+# SECTION 2b: Great-circle leg metrics and data-quality flags
+st.header("📏 Leg Metrics")
+ports = load_ports()
+service_speed = st.number_input("Service speed (knots)", min_value=1.0, max_value=30.0, value=14.0, step=0.5)
+with instrument.stage('leg metrics', 'aggregate', rows=len(df_filtered)):
+    metrics = leg_metrics(df_filtered, ports, service_speed=service_speed)
+st.dataframe(vessel_summary(metrics), use_container_width=True)
+flagged = metrics[metrics['Issue'].notna()]
+if not flagged.empty:
+    st.warning(f"{len(flagged)} leg(s) have data-quality issues (unknown port, bad dates or impossible speed).")
+    with st.expander("Flagged legs"):
+        st.dataframe(flagged, use_container_width=True)
+with st.expander("Port-to-port distances (nm)"):
+    st.dataframe(ports.distances(), use_container_width=True)
 
 # SECTION 3: Port Call Frequency
 st.header("📊 Port Call Frequency")
-call_freq = df_filtered.groupby(['Unloading port', 'Vessel']).size().reset_index(name='Calls')
-fig_bar = px.bar(call_freq, x='Unloading port', y='Calls', color='Vessel', title='Port Call Frequency by Vessel')
-st.plotly_chart(fig_bar, use_container_width=True)
+call_freq = port_call_counts(df_filtered)
+call_freq = chart_render.capped_categories(call_freq, 'Unloading port', 'Calls', by='Vessel')
+with instrument.stage('port call chart', 'render', rows=len(call_freq)):
+    fig_bar = px.bar(call_freq, x='Unloading port', y='Calls', color='Vessel', title='Port Call Frequency by Vessel')
+    st.plotly_chart(fig_bar, use_container_width=True)
 
 # SECTION 4: Intersection Ports
 st.header("🧭 Intersection Ports")
-intersections = df_filtered.groupby('Unloading port')['Vessel'].nunique().reset_index(name='Unique Vessels')
+intersections = port_vessel_counts(df_filtered)
 fig_ports = px.scatter(intersections, x='Unloading port', y='Unique Vessels', size='Unique Vessels', color='Unique Vessels', title='Ports Used by Multiple Vessels')
 st.plotly_chart(fig_ports, use_container_width=True)
 
-# SECTION 5: Strategic Port Ranking
+# SECTION 5: Strategic Port Ranking (network importance: betweenness, then degree and traffic)
 st.header("🏆 Important Ports")
-df_ports = pd.concat([df_filtered[['Port of loading']], df_filtered[['Unloading port']].rename(columns={'Unloading port': 'Port of loading'})])
-port_rank = df_ports['Port of loading'].value_counts().reset_index()
-port_rank.columns = ['Port', 'Frequency']
-fig_rank = px.bar(port_rank, x='Port', y='Frequency', title='Most Frequently Used Ports')
+network = load_network(edge_key(edges))
+port_rank = network.metrics.head(chart_render.MAX_HEATMAP_AXIS)
+st.dataframe(network.metrics, use_container_width=True)
+fig_rank = px.bar(port_rank, x='Port', y='Betweenness', color='Degree', hover_data=['Legs', 'Closeness'],
+                  title='Most Important Ports in the Route Network')
 st.plotly_chart(fig_rank, use_container_width=True)
 
 # SECTION 6: Network Graph
 st.header("🌐 Route Network Graph")
-G = nx.from_pandas_edgelist(df_filtered, 'Port of loading', 'Unloading port', create_using=nx.DiGraph())
-pos = nx.spring_layout(G)
-fig_net = go.Figure()
-for edge in G.edges():
-    fig_net.add_trace(go.Scatter(x=[pos[edge[0]][0], pos[edge[1]][0]], y=[pos[edge[0]][1], pos[edge[1]][1]],
-                                 mode='lines', line=dict(width=1, color='gray')))
-for node in G.nodes():
-    fig_net.add_trace(go.Scatter(x=[pos[node][0]], y=[pos[node][1]], text=[node], mode='markers+text',
-                                 marker=dict(size=10), textposition='top center'))
-fig_net.update_layout(showlegend=False, title='Port Connection Graph', margin=dict(l=0, r=0, t=30, b=0))
-st.plotly_chart(fig_net, use_container_width=True)
+with instrument.stage('network graph', 'render', rows=len(network.metrics)):
+    fig_net = network.figure()
+    fig_net.update_layout(showlegend=False, title='Port Connection Graph', margin=dict(l=0, r=0, t=30, b=0))
+    st.plotly_chart(fig_net, use_container_width=True)
+
+instrument.panel()